@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from datetime import date
 
 
 @dataclass(frozen=True)
@@ -32,7 +32,13 @@ TRUSTED_RSS_SOURCES = {
 
 
 GITHUB_SEARCH_ENDPOINT = "https://api.github.com/search/repositories"
-GITHUB_DEFAULT_QUERY = "language:Python topic:artificial-intelligence pushed:>={date}"
+GITHUB_DEFAULT_QUERY = "language:Python topic:artificial-intelligence pushed:{pushed}"
+
+# Search query templates fanned out by fetch_github_items; `{pushed}` is
+# filled with the date window. Override with GITHUB_QUERIES (`;`-separated).
+GITHUB_QUERIES: list[str] = [
+    GITHUB_DEFAULT_QUERY,
+]
 
 
 # Low-cost fallback keyword filter for local test mode.
@@ -72,6 +78,5 @@ NEGATIVE_KEYWORDS = {
 }
 
 
-def github_query_for_recent(days: int = 7) -> str:
-    since = (datetime.now(timezone.utc) - timedelta(days=days)).date().isoformat()
-    return GITHUB_DEFAULT_QUERY.format(date=since)
+def github_query_for_window(query: str, start: date, end: date) -> str:
+    return query.format(pushed=f"{start.isoformat()}..{end.isoformat()}")
@@ -9,10 +9,28 @@ from dotenv import load_dotenv
 
 from email_sender import render_digest_html, send_digest_email
 from pipeline.analyze import analyze_candidates
+from pipeline.enrich import enrich_articles
 from pipeline.ingest import fetch_github_items, fetch_rss_items
-from pipeline.normalize import dedupe_items
+from pipeline.llm_usage import append_usage_log
+from pipeline.normalize import cluster_near_duplicates, dedupe_items
+from pipeline.preprocess import preprocess_items
 from pipeline.publish import write_outputs
+from pipeline.published import (
+    filter_published,
+    load_published_index,
+    record_published,
+    save_published_index,
+)
 from pipeline.select import select_diversified_top_items
+from pipeline.sources import record_source_yield
+from pipeline.watermark import (
+    advance_watermarks,
+    filter_new_items,
+    load_watermarks,
+    run_tier,
+    save_watermarks,
+    settled_items,
+)
 
 
 def parse_args() -> argparse.Namespace:
@@ -21,6 +39,37 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--github-limit", type=int, default=10)
     p.add_argument("--top-k", type=int, default=12)
     p.add_argument("--no-llm", action="store_true")
+    p.add_argument(
+        "--cascade",
+        action="store_true",
+        help="Pre-score with the heuristic and send only the top fraction (plus a sample) to the LLM.",
+    )
+    p.add_argument(
+        "--full-rescan",
+        action="store_true",
+        help="Ignore ingest watermarks and the published index; reprocess every fetched entry.",
+    )
+    p.add_argument(
+        "--probe-all-sources",
+        action="store_true",
+        help="Also fetch feeds the source registry has demoted or marked dead.",
+    )
+    p.add_argument(
+        "--no-adaptive-depth",
+        action="store_true",
+        help="Use --max-rss-per-source for every feed instead of yield-based depth.",
+    )
+    p.add_argument(
+        "--max-age-days",
+        type=int,
+        default=None,
+        help="Drop entries published longer ago than this (default MAX_ITEM_AGE_DAYS, 0 disables).",
+    )
+    p.add_argument(
+        "--enrich",
+        action="store_true",
+        help="Fetch full article text for RSS items with short summaries before analyze.",
+    )
     p.add_argument("--send-email", action="store_true")
     return p.parse_args()
 
@@ -34,19 +83,73 @@ def main() -> None:
     output_dir = root_dir / "outputs"
 
     print("[PIPELINE] Step 1/5 ingest")
-    rss_items = fetch_rss_items(args.max_rss_per_source)
+    rss_items, ingest_meta = fetch_rss_items(
+        args.max_rss_per_source,
+        probe_all_sources=args.probe_all_sources,
+        adaptive_depth=not args.no_adaptive_depth,
+        max_age_days=args.max_age_days,
+    )
     github_items = []
     try:
-        github_items = fetch_github_items(args.github_limit, token=os.getenv("GITHUB_TOKEN"))
+        github_items, github_meta = fetch_github_items(
+            args.github_limit, token=os.getenv("GITHUB_TOKEN"), max_age_days=args.max_age_days
+        )
+        ingest_meta.update(github_meta)
     except Exception as exc:
         print(f"[WARN] GitHub fetch failed: {exc}")
 
+    ingested = rss_items + github_items
+    print(
+        "[INFO] dropped as stale: "
+        f"rss={ingest_meta['rss_items_stale']}, github={ingest_meta.get('github_items_stale', 0)}"
+    )
+    watermarks = load_watermarks()
+    watermark_skipped = 0
+    # --no-llm runs skip what any run already settled; LLM runs still pick up
+    # items that were only scored by keywords (here and in the published index).
+    requested_tier = "heuristic" if args.no_llm else "llm"
+    if not args.full_rescan:
+        ingested, watermark_skipped = filter_new_items(ingested, watermarks, requested_tier)
+        print(f"[INFO] skipped by watermark: {watermark_skipped}")
+
     print("[PIPELINE] Step 2/5 normalize+dedupe")
-    candidates = dedupe_items(rss_items + github_items)
-    print(f"[INFO] candidates after dedupe: {len(candidates)}")
+    candidates = dedupe_items(ingested)
+    candidates, near_dup_meta = cluster_near_duplicates(candidates)
+    ingest_meta.update(near_dup_meta)
+    print(
+        f"[INFO] candidates after dedupe: {len(candidates)} "
+        f"(near-duplicates merged: {near_dup_meta['near_dup_removed']})"
+    )
+    published_index = load_published_index()
+    published_skipped = 0
+    if not args.full_rescan:
+        candidates, published_meta = filter_published(candidates, published_index, requested_tier)
+        ingest_meta.update(published_meta)
+        published_skipped = published_meta["published_already"]
+        print(f"[INFO] already published: {published_skipped}")
+    if not candidates and (watermark_skipped or published_skipped):
+        print("[INFO] No new entries since last run. Use --full-rescan to reprocess.")
+        return
+    if args.enrich:
+        candidates, enrich_meta = enrich_articles(candidates)
+        ingest_meta.update(enrich_meta)
+        print(
+            "[INFO] enrichment: "
+            f"fetched={enrich_meta['enrich_fetched']}, cache_hits={enrich_meta['enrich_cache_hits']}"
+        )
+
+    candidates, preprocess_meta = preprocess_items(candidates)
+    ingest_meta.update(preprocess_meta)
+    print(
+        "[INFO] preprocess: "
+        f"tokens {preprocess_meta['preprocess_tokens_before']} -> "
+        f"{preprocess_meta['preprocess_tokens_after']}"
+    )
 
     print("[PIPELINE] Step 3/5 analyze")
-    analyzed, analysis_meta = analyze_candidates(candidates, use_llm=not args.no_llm)
+    analyzed, analysis_meta = analyze_candidates(
+        candidates, use_llm=not args.no_llm, cascade=args.cascade
+    )
 
     print("[PIPELINE] Step 4/5 select")
     top_items = select_diversified_top_items(analyzed, args.top_k)
@@ -58,15 +161,29 @@ def main() -> None:
 
     run_meta = {
         **analysis_meta,
+        **ingest_meta,
         "top_k": args.top_k,
         "max_rss_per_source": args.max_rss_per_source,
         "github_limit": args.github_limit,
+        "full_rescan": args.full_rescan,
+        "watermark_skipped": watermark_skipped,
     }
 
     print("[PIPELINE] Step 5/5 publish")
     md_path, json_path = write_outputs(analyzed, top_items, output_dir, run_meta=run_meta)
     print(f"[OK] Digest written: {md_path}")
     print(f"[OK] JSON written:   {json_path}")
+    tier = run_tier(str(analysis_meta.get("analysis_mode", "")))
+    settled = settled_items(ingested, analyzed, tier)
+    unsettled = len(ingested) - sum(len(x) for x in settled.values())
+    if unsettled:
+        print(f"[INFO] watermark held back for {unsettled} items with fallback analysis")
+    for settled_tier, tier_items in settled.items():
+        watermarks = advance_watermarks(watermarks, tier_items, settled_tier)
+    save_watermarks(watermarks)
+    save_published_index(record_published(published_index, top_items))
+    record_source_yield(analyzed, top_items)
+    append_usage_log("phase1_rss", run_meta.get("llm_usage"))
 
     if args.send_email:
         required = [
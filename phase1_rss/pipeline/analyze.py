@@ -1,14 +1,59 @@
 from __future__ import annotations
 
 import json
+import math
 import os
+import random
 import re
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from typing import Any
 
 import requests
 
-from config import NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS, TRUSTED_RSS_SOURCES
+from config import NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS
+from pipeline.keywords import KeywordMatcher
+from pipeline.llm_cache import (
+    cache_key,
+    content_hash,
+    get_cached,
+    load_llm_cache,
+    put_cached,
+    save_llm_cache,
+)
+from pipeline.llm_hedge import LatencyTracker, hedged_call
+from pipeline.llm_rate import LlmRateLimiter
+from pipeline.llm_usage import LlmBudgetExceeded, llm_usage
+from pipeline.local_model import load_local_model
+from pipeline.openai_text import extract_openai_text
+from pipeline.preprocess import estimate_tokens
+from pipeline.sources import trusted_source_names
+
+
+# Bump whenever the prompt or output schema changes; it invalidates cached results.
+PROMPT_VERSION = "v1"
+# fallback_reason for items the model never returned, even after a follow-up.
+MISSING_FROM_OUTPUT = "missing_from_llm_output"
+# Rough per-item allowance for the JSON the model writes back.
+LLM_OUTPUT_TOKENS_PER_ITEM = 220
+LLM_RESULT_FIELDS = (
+    "is_relevant",
+    "relevance_score",
+    "novelty_score",
+    "actionability_score",
+    "category",
+    "summary_cn",
+    "key_points",
+    "why_it_matters",
+    "next_action",
+)
+_POSITIVE_MATCHER = KeywordMatcher(POSITIVE_KEYWORDS)
+_NEGATIVE_MATCHER = KeywordMatcher(NEGATIVE_KEYWORDS)
+# Start of an object element inside a JSON array.
+_ARRAY_ELEMENT = re.compile(r"[\[,]\s*(?=\{)")
+_FINGERPRINT_TOKEN = re.compile(r"[a-z0-9]+|[\u3400-\u9fff]")
 
 
 def _has_value(name: str) -> bool:
@@ -46,13 +91,25 @@ def _extract_json_array(raw: str) -> list[dict[str, Any]]:
             return parsed
     except json.JSONDecodeError:
         pass
-    match = re.search(r"\[[\s\S]*\]", raw)
-    if not match:
+    # Damaged or truncated output: decode each object element on its own so a
+    # bad or cut-off item only costs itself, not the rest of the batch.
+    decoder = json.JSONDecoder()
+    salvaged: list[dict[str, Any]] = []
+    pos = raw.find("[")
+    while pos >= 0:
+        match = _ARRAY_ELEMENT.search(raw, pos)
+        if not match:
+            break
+        try:
+            obj, pos = decoder.raw_decode(raw, match.end())
+        except json.JSONDecodeError:
+            pos = match.end() + 1
+            continue
+        if isinstance(obj, dict):
+            salvaged.append(obj)
+    if not salvaged:
         raise ValueError("Could not parse JSON array from model output.")
-    parsed = json.loads(match.group(0))
-    if not isinstance(parsed, list):
-        raise ValueError("Model output JSON is not a list.")
-    return parsed
+    return salvaged
 
 
 def _safe_score(value: Any) -> int:
@@ -87,36 +144,84 @@ def _merge_llm_result(
                 "key_points": enrich.get("key_points", []),
                 "why_it_matters": enrich.get("why_it_matters", ""),
                 "next_action": enrich.get("next_action", ""),
+                "analysis_source": "llm" if item["id"] in by_id else "llm_missing",
             }
         )
     return merged
 
 
+def _item_payload(x: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": x["id"],
+        "title": x["title"],
+        "source": x["source"],
+        "link": x["link"],
+        "content": x.get("prompt_text") or (x.get("article_text") or x["content"])[:1800],
+    }
+
+
+def _item_cache_key(x: dict[str, Any], model: str) -> str:
+    return cache_key(str(x["id"]), content_hash(_item_payload(x)), model, PROMPT_VERSION)
+
+
+def _content_fingerprint(x: dict[str, Any]) -> str:
+    # Title and prompt content only: the same story under another id, source
+    # or link still matches, as do copies differing in case or punctuation.
+    text = f"{x['title']} {_item_payload(x)['content']}".lower()
+    return content_hash({"text": " ".join(_FINGERPRINT_TOKEN.findall(text))})
+
+
+PROMPT_INSTRUCTIONS = (
+    "You are an AI technology analyst. Return strict JSON array only. "
+    "For each input item, output fields: id, is_relevant(boolean), "
+    "relevance_score(0-100), novelty_score(0-100), actionability_score(0-100), "
+    "category, summary_cn, key_points(array), "
+    "why_it_matters(max 40 Chinese chars), next_action(max 40 Chinese chars). "
+    "No markdown, no explanation.\n\n"
+)
+
+
+def _build_prompt(items: list[dict[str, Any]]) -> str:
+    payload = [_item_payload(x) for x in items]
+    return PROMPT_INSTRUCTIONS + json.dumps(payload, ensure_ascii=False)
+
+
+def _estimate_item_tokens(x: dict[str, Any]) -> int:
+    payload = json.dumps(_item_payload(x), ensure_ascii=False)
+    return estimate_tokens(payload) + LLM_OUTPUT_TOKENS_PER_ITEM
+
+
+def _estimate_batch_tokens(items: list[dict[str, Any]]) -> int:
+    return estimate_tokens(PROMPT_INSTRUCTIONS) + sum(_estimate_item_tokens(x) for x in items)
+
+
+def _pack_batches(
+    items: list[dict[str, Any]], token_budget: int, max_items: int
+) -> list[list[int]]:
+    sizes = [_estimate_item_tokens(x) for x in items]
+    capacity = max(1, token_budget - estimate_tokens(PROMPT_INSTRUCTIONS))
+    bins: list[list[int]] = []
+    loads: list[int] = []
+    # First-fit decreasing: place the largest items first so small ones fill the gaps.
+    for idx in sorted(range(len(items)), key=lambda i: sizes[i], reverse=True):
+        for b, load in enumerate(loads):
+            if load + sizes[idx] <= capacity and len(bins[b]) < max_items:
+                bins[b].append(idx)
+                loads[b] += sizes[idx]
+                break
+        else:
+            bins.append([idx])
+            loads.append(sizes[idx])
+    # Keep candidate order inside and across batches so prompts read naturally.
+    return sorted((sorted(b) for b in bins), key=lambda b: b[0])
+
+
 def _gemini_analyze_batch(
     items: list[dict[str, Any]],
     model: str,
     api_key: str,
-) -> list[dict[str, Any]]:
-    payload = [
-        {
-            "id": x["id"],
-            "title": x["title"],
-            "source": x["source"],
-            "link": x["link"],
-            "content": x["content"][:1800],
-        }
-        for x in items
-    ]
-    prompt = (
-        "You are an AI technology analyst. Return strict JSON array only. "
-        "For each input item, output fields: id, is_relevant(boolean), "
-        "relevance_score(0-100), novelty_score(0-100), actionability_score(0-100), "
-        "category, summary_cn, key_points(array), "
-        "why_it_matters(max 40 Chinese chars), next_action(max 40 Chinese chars). "
-        "No markdown, no explanation.\n\n"
-        + json.dumps(payload, ensure_ascii=False)
-    )
-
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    prompt = _build_prompt(items)
     url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
     resp = requests.post(
         url,
@@ -138,11 +243,35 @@ def _gemini_analyze_batch(
     if not text:
         raise ValueError("Gemini returned empty content.")
     arr = _extract_json_array(text)
-    return _merge_llm_result(items, arr)
+    usage = data.get("usageMetadata") or {}
+    return _merge_llm_result(items, arr), {
+        "input_tokens": int(usage.get("promptTokenCount", 0) or 0),
+        "output_tokens": int(usage.get("candidatesTokenCount", 0) or 0),
+    }
 
 
-def _chunked(items: list[dict[str, Any]], chunk_size: int) -> list[list[dict[str, Any]]]:
-    return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+def _openai_analyze_batch(
+    items: list[dict[str, Any]],
+    model: str,
+    api_key: str,
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    resp = requests.post(
+        "https://api.openai.com/v1/responses",
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        json={"model": model, "input": _build_prompt(items)},
+        timeout=60,
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    arr = _extract_json_array(extract_openai_text(data))
+    usage = data.get("usage") or {}
+    return _merge_llm_result(items, arr), {
+        "input_tokens": int(usage.get("input_tokens", 0) or 0),
+        "output_tokens": int(usage.get("output_tokens", 0) or 0),
+    }
 
 
 def _is_retryable_exception(exc: Exception) -> bool:
@@ -156,19 +285,43 @@ def _is_retryable_exception(exc: Exception) -> bool:
     return False
 
 
-def heuristic_analyze(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+def _is_parse_exception(exc: Exception) -> bool:
+    return isinstance(exc, ValueError)
+
+
+def _is_fatal_exception(exc: Exception) -> bool:
+    # Auth/model errors fail every batch alike; stop calling instead of retrying each one.
+    if isinstance(exc, requests.HTTPError):
+        status_code = exc.response.status_code if exc.response is not None else 0
+        return status_code in {401, 403, 404}
+    return False
+
+
+def _heuristic_chunk(
+    items: list[dict[str, Any]],
+    trusted_sources: set[str],
+    adjustments: list[tuple[float, str, float]] | None = None,
+) -> list[dict[str, Any]]:
+    min_confidence = float(os.getenv("LOCAL_MODEL_MIN_CONFIDENCE", "0.5"))
     analyzed: list[dict[str, Any]] = []
-    for item in items:
-        text = f"{item.get('title', '')} {item.get('content', '')}".lower()
-        positive = sum(1 for k in POSITIVE_KEYWORDS if k in text)
-        negative = sum(1 for k in NEGATIVE_KEYWORDS if k in text)
+    for pos, item in enumerate(items):
+        body = item.get("article_text") or item.get("content", "")
+        text = f"{item.get('title', '')} {body}".lower()
+        positive = _POSITIVE_MATCHER.count(text)
+        negative = _NEGATIVE_MATCHER.count(text)
         source_name = str(item.get("source", ""))
         source_bonus = (
             8
-            if item.get("origin_type") == "rss" and source_name in TRUSTED_RSS_SOURCES
+            if item.get("origin_type") == "rss" and source_name in trusted_sources
             else 0
         )
         relevance = max(0, min(100, 25 + positive * 12 - negative * 20 + source_bonus))
+        category = "ai-engineering"
+        if adjustments is not None:
+            delta, predicted, confidence = adjustments[pos]
+            relevance = max(0, min(100, round(relevance + delta)))
+            if predicted and confidence >= min_confidence:
+                category = predicted
         novelty = max(0, min(100, 35 + positive * 9))
         actionability = max(0, min(100, 20 + positive * 8))
         threshold = 48 if item.get("origin_type") == "rss" else 55
@@ -182,7 +335,7 @@ def heuristic_analyze(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
                 "novelty_score": novelty,
                 "actionability_score": actionability,
                 "total_score": total,
-                "category": "ai-engineering" if is_relevant else "noise",
+                "category": category if is_relevant else "noise",
                 "summary_cn": "Heuristic mode summary: keyword-based relevance scoring.",
                 "key_points": [],
                 "why_it_matters": (
@@ -195,19 +348,94 @@ def heuristic_analyze(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
                     if is_relevant
                     else "保留观察，等待更多验证信号。"
                 ),
+                "analysis_source": "heuristic",
             }
         )
     return analyzed
 
 
+def heuristic_analyze(
+    items: list[dict[str, Any]], use_local_model: bool = True
+) -> list[dict[str, Any]]:
+    trusted_sources = trusted_source_names()
+    workers = max(1, int(os.getenv("HEURISTIC_WORKERS", str(os.cpu_count() or 1))))
+    min_parallel = max(1, int(os.getenv("HEURISTIC_PARALLEL_MIN_ITEMS", "20000")))
+    model = load_local_model() if use_local_model else None
+    # The local model scores the whole batch in one vectorized pass.
+    adjustments = model.score(items) if model is not None else None
+    if workers == 1 or len(items) < min_parallel:
+        return _heuristic_chunk(items, trusted_sources, adjustments)
+
+    # Large backlog replays: fan chunks out to worker processes; pool.map
+    # returns chunks in order, so the output order matches the input.
+    size = max(1000, -(-len(items) // (workers * 4)))
+    chunks = [items[i : i + size] for i in range(0, len(items), size)]
+    adjustment_chunks = (
+        [adjustments[i : i + size] for i in range(0, len(items), size)]
+        if adjustments is not None
+        else repeat(None, len(chunks))
+    )
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(
+            _heuristic_chunk, chunks, repeat(trusted_sources, len(chunks)), adjustment_chunks
+        )
+        return [item for chunk in results for item in chunk]
+
+
+def _cascade_gate(
+    misses: list[int],
+    candidates: list[dict[str, Any]],
+    results: list[dict[str, Any] | None],
+) -> tuple[list[int], dict[str, Any]]:
+    top_fraction = min(1.0, max(0.0, float(os.getenv("CASCADE_TOP_FRACTION", "0.3"))))
+    explore_fraction = min(1.0, max(0.0, float(os.getenv("CASCADE_EXPLORE_FRACTION", "0.05"))))
+    min_items = max(0, int(os.getenv("CASCADE_MIN_LLM_ITEMS", "8")))
+
+    prescored = heuristic_analyze([candidates[idx] for idx in misses])
+    ranked = sorted(
+        range(len(misses)),
+        key=lambda pos: (prescored[pos]["total_score"], prescored[pos]["relevance_score"]),
+        reverse=True,
+    )
+    keep_count = min(len(misses), max(min_items, math.ceil(top_fraction * len(misses))))
+    kept = set(ranked[:keep_count])
+    rest = ranked[keep_count:]
+    # A random slice of low-ranked items still goes to the LLM so the gate's
+    # misses show up in the digests instead of being silently dropped forever.
+    explored = random.sample(rest, min(len(rest), math.ceil(explore_fraction * len(rest))))
+    kept.update(explored)
+
+    for pos in rest:
+        if pos not in kept:
+            results[misses[pos]] = {**prescored[pos], "analysis_source": "heuristic_gated"}
+    threshold = prescored[ranked[keep_count - 1]]["total_score"] if keep_count else None
+    gate_meta = {
+        "cascade_gate_threshold": threshold,
+        "cascade_llm_items": len(kept),
+        "cascade_explored": len(explored),
+        "cascade_skipped": len(misses) - len(kept),
+    }
+    return [misses[pos] for pos in sorted(kept)], gate_meta
+
+
 def analyze_candidates(
     candidates: list[dict[str, Any]],
     use_llm: bool,
+    cascade: bool = False,
 ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
-    batch_size = max(1, int(os.getenv("LLM_BATCH_SIZE", "6")))
+    batch_size = max(1, int(os.getenv("LLM_BATCH_SIZE", "16")))
+    batch_token_budget = max(500, int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "6000")))
     max_retries = max(0, int(os.getenv("LLM_MAX_RETRIES", "2")))
+    concurrency = max(1, int(os.getenv("LLM_CONCURRENCY", "4")))
     gemini_model = _normalize_gemini_model(os.getenv("GEMINI_MODEL"))
     has_gemini = _has_value("GEMINI_API_KEY")
+    openai_model = (
+        os.getenv("OPENAI_ANALYZE_MODEL") or os.getenv("OPENAI_MODEL") or "gpt-4.1-mini"
+    ).strip()
+    # OPENAI_API_KEY alone (already set for the agent) does not opt analyze in.
+    has_openai = _has_value("OPENAI_API_KEY") and (
+        os.getenv("LLM_SECONDARY_PROVIDER", "").strip().lower() == "openai"
+    )
 
     run_meta = {
         "analysis_mode": "heuristic",
@@ -217,8 +445,11 @@ def analyze_candidates(
         "llm_provider_attempted": "none",
         "llm_attempts": 0,
         "llm_batch_size": batch_size,
+        "llm_batch_token_budget": batch_token_budget,
         "llm_max_retries": max_retries,
     }
+    local_model = load_local_model()
+    run_meta["local_model"] = local_model.trained_at if local_model is not None else None
 
     if not use_llm:
         print("[INFO] Running in heuristic mode (--no-llm).")
@@ -229,45 +460,312 @@ def analyze_candidates(
         run_meta["analysis_mode"] = "heuristic_fallback"
         run_meta["fallback_used"] = True
         run_meta["fallback_reason"] = "GEMINI_API_KEY missing."
-        return heuristic_analyze(candidates), run_meta
+        # Tagged as a fallback so the items are analyzed again once the key is set.
+        return [
+            {**x, "analysis_source": "heuristic_fallback", "fallback_reason": run_meta["fallback_reason"]}
+            for x in heuristic_analyze(candidates)
+        ], run_meta
 
     print(f"[INFO] Using Gemini model: {gemini_model}")
     run_meta["analysis_mode"] = "llm_gemini"
     run_meta["model"] = gemini_model
     run_meta["llm_provider_attempted"] = "gemini"
 
-    analyzed: list[dict[str, Any]] = []
     api_key = os.environ["GEMINI_API_KEY"]
-    batches = _chunked(candidates, batch_size)
-    try:
-        for batch_index, batch in enumerate(batches, start=1):
-            for retry in range(max_retries + 1):
-                try:
-                    run_meta["llm_attempts"] += 1
-                    batch_result = _gemini_analyze_batch(
-                        batch, model=gemini_model, api_key=api_key
+    providers = {
+        "gemini": lambda batch: _gemini_analyze_batch(batch, model=gemini_model, api_key=api_key)
+    }
+    models = {"gemini": gemini_model}
+    if has_openai:
+        # OpenAI is the secondary: hedged behind slow Gemini batches and
+        # taking over batches that Gemini fails outright.
+        openai_key = os.environ["OPENAI_API_KEY"]
+        providers["openai"] = lambda batch: _openai_analyze_batch(
+            batch, model=openai_model, api_key=openai_key
+        )
+        models["openai"] = openai_model
+        run_meta["llm_provider_attempted"] = "gemini+openai"
+        run_meta["secondary_model"] = openai_model
+    cache = load_llm_cache()
+    results: list[dict[str, Any] | None] = [None] * len(candidates)
+    for idx, item in enumerate(candidates):
+        # Results are cached under the model that produced them; a result from
+        # any configured provider is reused.
+        cached = next(
+            (
+                hit
+                for hit in (get_cached(cache, _item_cache_key(item, model)) for model in models.values())
+                if hit is not None
+            ),
+            None,
+        )
+        if cached is not None:
+            merged = _merge_llm_result([item], [{**cached, "id": item["id"]}])[0]
+            results[idx] = {
+                **merged,
+                "analysis_source": "llm_cache",
+                "llm_provider": cached.get("llm_provider", "gemini"),
+            }
+    misses = [idx for idx, x in enumerate(results) if x is None]
+    run_meta["llm_cache_hits"] = len(candidates) - len(misses)
+    run_meta["llm_cache_misses"] = len(misses)
+    print(f"[INFO] LLM cache: hits={run_meta['llm_cache_hits']}, misses={len(misses)}")
+    # Identical content under different ids (syndicated feeds, a repo found by
+    # GitHub search and linked from a blog) is analyzed once, then fanned out.
+    leaders: dict[str, int] = {}
+    for idx, x in enumerate(results):
+        if x is not None and x["analysis_source"] == "llm_cache":
+            leaders.setdefault(_content_fingerprint(candidates[idx]), idx)
+    followers: dict[int, int] = {}
+    unique_misses: list[int] = []
+    for idx in misses:
+        fingerprint = _content_fingerprint(candidates[idx])
+        if fingerprint in leaders:
+            followers[idx] = leaders[fingerprint]
+        else:
+            leaders[fingerprint] = idx
+            unique_misses.append(idx)
+    run_meta["llm_prompt_dedupe_items"] = len(followers)
+    run_meta["llm_prompt_dedupe_ratio"] = round(len(followers) / len(misses), 3) if misses else 0.0
+    if followers:
+        print(f"[INFO] LLM prompt dedupe: {len(followers)}/{len(misses)} items share content with another id.")
+    misses = unique_misses
+
+    run_meta["cascade"] = cascade
+    if cascade and misses:
+        misses, gate_meta = _cascade_gate(misses, candidates, results)
+        run_meta.update(gate_meta)
+        print(
+            "[INFO] cascade gate: "
+            f"llm={gate_meta['cascade_llm_items']} (explored {gate_meta['cascade_explored']}), "
+            f"skipped={gate_meta['cascade_skipped']}, threshold={gate_meta['cascade_gate_threshold']}"
+        )
+
+    pending = [candidates[idx] for idx in misses]
+    packed = _pack_batches(pending, batch_token_budget, batch_size)
+    batch_order = [misses[pos] for group in packed for pos in group]
+    batches = [[pending[pos] for pos in group] for group in packed]
+    limiter = LlmRateLimiter.from_env()
+    counter_lock = threading.Lock()
+    errors: list[Exception] = []
+    aborted: list[Exception] = []
+    # Providers that failed with auth/model errors are skipped by later batches.
+    disabled: dict[str, Exception] = {}
+    latency = LatencyTracker.from_env()
+    ledger = llm_usage()
+    hedge_pool = ThreadPoolExecutor(max_workers=concurrency * len(providers))
+    started = time.monotonic()
+    run_meta["llm_concurrency"] = concurrency
+    run_meta["llm_batch_splits"] = 0
+    run_meta["llm_batches_failed"] = 0
+    run_meta["llm_hedged_batches"] = 0
+    run_meta["llm_failover_batches"] = 0
+    run_meta["llm_abandoned_calls"] = 0
+    run_meta["llm_followup_calls"] = 0
+    run_meta["llm_followup_items"] = 0
+    run_meta["llm_provider_batches"] = {}
+    run_meta["llm_batch_tokens"] = []
+
+    def _provider_call(name: str, batch: list[dict[str, Any]], predicted: int):
+        model = models[name]
+        # Exactly one ledger row per call: written on completion, or when the
+        # call loses a hedge race and is abandoned while still in flight.
+        state = {"started": time.monotonic(), "recorded": False}
+        state_lock = threading.Lock()
+
+        def _record(input_tokens: int, output_tokens: int, ok: bool) -> bool:
+            with state_lock:
+                if state["recorded"]:
+                    return False
+                state["recorded"] = True
+            seconds = time.monotonic() - state["started"]
+            ledger.record("analyze", name, model, input_tokens, output_tokens, seconds, ok=ok)
+            return True
+
+        def call():
+            state["started"] = time.monotonic()
+            try:
+                merged, tokens = providers[name](batch)
+            except Exception as exc:
+                _record(0, 0, ok=False)
+                if _is_fatal_exception(exc):
+                    with counter_lock:
+                        disabled.setdefault(name, exc)
+                raise
+            _record(tokens["input_tokens"], tokens["output_tokens"], ok=True)
+            return merged, tokens
+
+        def abandon() -> None:
+            # The prompt was already sent and is billed; its output is unknown.
+            if _record(predicted - LLM_OUTPUT_TOKENS_PER_ITEM * len(batch), 0, ok=False):
+                with counter_lock:
+                    run_meta["llm_abandoned_calls"] += 1
+
+        return call, abandon
+
+    def _call_batch(label: str, batch: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        retry = 0
+        predicted = _estimate_batch_tokens(batch)
+        while True:
+            if aborted:
+                raise aborted[0]
+            handles = {
+                name: _provider_call(name, batch, predicted) for name in providers if name not in disabled
+            }
+            calls = [(name, call) for name, (call, _) in handles.items()]
+            if not calls:
+                raise next(iter(disabled.values()))
+            try:
+                ledger.check("analyze", predicted)
+            except LlmBudgetExceeded as exc:
+                with counter_lock:
+                    aborted.append(exc)
+                raise
+            limiter.acquire(predicted)
+            with counter_lock:
+                run_meta["llm_attempts"] += 1
+            call_started = time.monotonic()
+            try:
+                (merged, usage), provider, hedged, failover = hedged_call(
+                    calls, hedge_pool, latency, on_abandon=lambda name: handles[name][1]()
+                )
+                with counter_lock:
+                    run_meta["llm_batch_tokens"].append(
+                        {
+                            "batch": label,
+                            "items": len(batch),
+                            "provider": provider,
+                            "hedged": hedged,
+                            "failover": failover,
+                            "seconds": round(time.monotonic() - call_started, 2),
+                            "predicted_tokens": predicted,
+                            **usage,
+                        }
                     )
-                    analyzed.extend(batch_result)
-                    break
-                except Exception as exc:
-                    can_retry = _is_retryable_exception(exc) and retry < max_retries
-                    if can_retry:
-                        delay = min(10, 2 ** retry)
-                        print(
-                            "[WARN] Gemini batch failed, retrying: "
-                            f"batch={batch_index}/{len(batches)}, retry={retry + 1}/{max_retries}, delay={delay}s"
-                        )
-                        time.sleep(delay)
-                        continue
+                    counts = run_meta["llm_provider_batches"]
+                    counts[provider] = counts.get(provider, 0) + 1
+                    run_meta["llm_hedged_batches"] += int(hedged)
+                    run_meta["llm_failover_batches"] += int(failover)
+                return [{**x, "llm_provider": provider} for x in merged]
+            except Exception as exc:
+                if _is_fatal_exception(exc) and len(disabled) == len(providers):
+                    with counter_lock:
+                        aborted.append(exc)
+                    raise
+                # A batch that fails to parse is split rather than resent whole.
+                if _is_parse_exception(exc) and len(batch) > 1:
                     raise
-        return analyzed, run_meta
-    except Exception as exc:
+                if not (_is_retryable_exception(exc) and retry < max_retries):
+                    raise
+                delay = min(10, 2 ** retry)
+                print(
+                    "[WARN] LLM batch failed, retrying: "
+                    f"batch={label}, retry={retry + 1}/{max_retries}, delay={delay}s"
+                )
+                time.sleep(delay)
+                retry += 1
+
+    def _run_batch(
+        label: str, batch: list[dict[str, Any]], follow_up: bool = True
+    ) -> list[dict[str, Any]]:
+        try:
+            merged = _call_batch(label, batch)
+        except Exception as exc:
+            if _is_parse_exception(exc) and len(batch) > 1 and not aborted:
+                mid = len(batch) // 2
+                with counter_lock:
+                    run_meta["llm_batch_splits"] += 1
+                print(f"[WARN] LLM batch {label} unparseable, splitting into {mid}+{len(batch) - mid}.")
+                return _run_batch(f"{label}a", batch[:mid], follow_up) + _run_batch(
+                    f"{label}b", batch[mid:], follow_up
+                )
+            with counter_lock:
+                run_meta["llm_batches_failed"] += 1
+                errors.append(exc)
+            reason = _sanitize_error_message(str(exc))
+            print(f"[WARN] LLM batch {label} failed, heuristic for {len(batch)} items: {reason}")
+            return [
+                {**x, "analysis_source": "heuristic_fallback", "fallback_reason": reason}
+                for x in heuristic_analyze(batch)
+            ]
+
+        # Items lost to truncated or damaged output are re-requested once, alone;
+        # the follow-up call leaves anything still missing to its caller.
+        if not follow_up:
+            return merged
+        missing = [pos for pos, x in enumerate(merged) if x["analysis_source"] == "llm_missing"]
+        if missing and not aborted:
+            with counter_lock:
+                run_meta["llm_followup_calls"] += 1
+                run_meta["llm_followup_items"] += len(missing)
+            print(f"[WARN] LLM batch {label} missing {len(missing)}/{len(batch)} items, re-requesting them.")
+            retried = _run_batch(f"{label}r", [batch[pos] for pos in missing], follow_up=False)
+            for pos, item in zip(missing, retried):
+                merged[pos] = item
+            missing = [pos for pos, x in enumerate(merged) if x["analysis_source"] == "llm_missing"]
+        if missing:
+            print(f"[WARN] LLM batch {label} still missing {len(missing)} items, heuristic for them.")
+            fallback = heuristic_analyze([batch[pos] for pos in missing])
+            for pos, item in zip(missing, fallback):
+                merged[pos] = {
+                    **item,
+                    "analysis_source": "heuristic_fallback",
+                    "fallback_reason": MISSING_FROM_OUTPUT,
+                }
+        return merged
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(_run_batch, f"{idx}/{len(batches)}", batch)
+            for idx, batch in enumerate(batches, start=1)
+        ]
+        # Collect in submission order so merged results follow candidate order.
+        fresh = [item for future in futures for item in future.result()]
+    hedge_pool.shutdown(wait=False, cancel_futures=True)
+    for idx, item in zip(batch_order, fresh):
+        results[idx] = item
+    for idx, leader in followers.items():
+        results[idx] = {**results[leader], **candidates[idx], "prompt_dedupe_of": candidates[leader]["id"]}
+    for idx in [*batch_order, *followers]:
+        item = results[idx]
+        if item.get("analysis_source") == "llm":
+            put_cached(
+                cache,
+                _item_cache_key(candidates[idx], models[item["llm_provider"]]),
+                {**{k: item[k] for k in LLM_RESULT_FIELDS}, "llm_provider": item["llm_provider"]},
+            )
+    save_llm_cache(cache)
+    run_meta["llm_seconds"] = round(time.monotonic() - started, 2)
+    hedge_after = latency.hedge_after()
+    run_meta["llm_hedge_after_seconds"] = round(hedge_after, 2) if hedge_after is not None else None
+    run_meta["llm_batches"] = len(batches)
+    run_meta["llm_tokens_predicted"] = sum(x["predicted_tokens"] for x in run_meta["llm_batch_tokens"])
+    run_meta["llm_tokens_actual"] = sum(
+        x["input_tokens"] + x["output_tokens"] for x in run_meta["llm_batch_tokens"]
+    )
+    run_meta["llm_usage"] = ledger.summary()
+
+    analyzed = [x for x in results if x is not None]
+    fallback_items = sum(1 for x in analyzed if x.get("analysis_source") == "heuristic_fallback")
+    run_meta["llm_items_fallback"] = fallback_items
+    if errors:
+        run_meta["fallback_used"] = True
+        run_meta["fallback_reason"] = _sanitize_error_message(str(errors[0]))
+    elif fallback_items:
+        run_meta["fallback_used"] = True
+        run_meta["fallback_reason"] = MISSING_FROM_OUTPUT
+    # Mode and model name whichever providers actually served results.
+    served = [name for name in models if any(x.get("llm_provider") == name for x in analyzed)]
+    if served:
+        run_meta["analysis_mode"] = "llm_" + "+".join(served)
+        run_meta["model"] = "+".join(models[name] for name in served)
+    if analyzed and fallback_items == len(analyzed):
         run_meta["analysis_mode"] = "heuristic_fallback"
         run_meta["model"] = "heuristic"
-        run_meta["fallback_used"] = True
-        run_meta["fallback_reason"] = _sanitize_error_message(str(exc))
         print(
-            "[WARN] Gemini analyze failed, fallback to heuristic: "
+            "[WARN] LLM analyze failed, fallback to heuristic: "
             f"{run_meta['fallback_reason']}"
         )
-        return heuristic_analyze(candidates), run_meta
+    elif fallback_items:
+        print(f"[WARN] LLM analyze degraded: {fallback_items}/{len(analyzed)} items used heuristic.")
+    return analyzed, run_meta
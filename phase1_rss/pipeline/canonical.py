@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import requests
+
+
+TRACKING_PARAM_PREFIXES = ("utm_", "mc_", "pk_", "hsa_", "_hs")
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "igshid",
+    "yclid",
+    "ref",
+    "ref_src",
+    "ref_url",
+    "source",
+    "src",
+    "campaign",
+    "cmpid",
+    "spm",
+    "share",
+    "sr_share",
+    "feature",
+    "__s",
+    "s_cid",
+}
+
+# Per-domain query rules. `keep` is an allow-list (everything else is
+# dropped); domains without a rule keep every non-tracking parameter.
+DOMAIN_RULES: dict[str, dict[str, set[str]]] = {
+    "youtube.com": {"keep": {"v", "list", "t"}},
+    "news.ycombinator.com": {"keep": {"id"}},
+    "arxiv.org": {"keep": set()},
+    "github.com": {"keep": set()},
+    "huggingface.co": {"keep": set()},
+    "medium.com": {"keep": set()},
+    "openai.com": {"keep": set()},
+    "paperswithcode.com": {"keep": set()},
+    "x.com": {"keep": set()},
+    "twitter.com": {"keep": set()},
+}
+
+# Wrapper hosts that carry the real target in a query parameter.
+REDIRECT_WRAPPERS: dict[str, tuple[str, ...]] = {
+    "www.google.com": ("q", "url"),
+    "google.com": ("q", "url"),
+    "l.facebook.com": ("u",),
+    "lm.facebook.com": ("u",),
+    "out.reddit.com": ("url",),
+    "l.messenger.com": ("u",),
+    "www.linkedin.com": ("url",),
+    "href.li": (),
+}
+
+# Hosts whose links only resolve over HTTP redirects.
+SHORTENER_HOSTS = {
+    "t.co",
+    "bit.ly",
+    "buff.ly",
+    "ow.ly",
+    "lnkd.in",
+    "tinyurl.com",
+    "goo.gl",
+    "dlvr.it",
+    "trib.al",
+    "feedproxy.google.com",
+    "feeds.feedburner.com",
+    "hubs.ly",
+    "rebrand.ly",
+}
+
+
+def _bare_host(host: str) -> str:
+    host = host.lower().strip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+def _rule_for(host: str) -> dict[str, set[str]] | None:
+    bare = _bare_host(host)
+    while bare:
+        if bare in DOMAIN_RULES:
+            return DOMAIN_RULES[bare]
+        if "." not in bare:
+            return None
+        bare = bare.split(".", 1)[1]
+    return None
+
+
+def _is_tracking(key: str) -> bool:
+    lowered = key.lower()
+    return lowered in TRACKING_PARAMS or lowered.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def _unwrap(url: str) -> str:
+    for _ in range(3):
+        p = urlparse(url)
+        host = (p.hostname or "").lower()
+        if host not in REDIRECT_WRAPPERS:
+            return url
+        keys = REDIRECT_WRAPPERS[host]
+        params = dict(parse_qsl(p.query))
+        target = next((params[k] for k in keys if params.get(k)), "") if keys else p.query
+        if not target.startswith(("http://", "https://")):
+            return url
+        url = target
+    return url
+
+
+def clean_url(url: str) -> str:
+    raw = (url or "").strip()
+    if not raw:
+        return ""
+    try:
+        p = urlparse(_unwrap(raw))
+        host = (p.hostname or "").lower()
+        if not host:
+            return raw
+        netloc = host
+        if p.port and not (
+            (p.scheme == "http" and p.port == 80) or (p.scheme == "https" and p.port == 443)
+        ):
+            netloc = f"{host}:{p.port}"
+        rule = _rule_for(host)
+        params = [
+            (k, v)
+            for k, v in parse_qsl(p.query, keep_blank_values=True)
+            if not _is_tracking(k) and (rule is None or k in rule["keep"])
+        ]
+        return urlunparse(
+            (
+                (p.scheme or "https").lower(),
+                netloc,
+                p.path or "/",
+                "",
+                urlencode(sorted(params)),
+                "",
+            )
+        )
+    except Exception:
+        return raw
+
+
+def dedupe_key(url: str) -> str:
+    cleaned = clean_url(url)
+    try:
+        p = urlparse(cleaned)
+    except Exception:
+        return cleaned.lower()
+    if not p.netloc:
+        return cleaned.lower()
+    path = p.path.rstrip("/") or "/"
+    for suffix in ("/index.html", "/index.htm"):
+        if path.endswith(suffix):
+            path = path[: -len(suffix)] or "/"
+    key = f"{_bare_host(p.netloc)}{path}"
+    return f"{key}?{p.query}" if p.query else key
+
+
+def _resolution_cache_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "outputs" / "url_resolution_cache.json"
+
+
+_RESOLUTION_CACHE: dict[str, dict[str, Any]] | None = None
+_RESOLUTION_LOCK = threading.Lock()
+_RESOLUTION_DIRTY = False
+
+
+def _resolution_cache() -> dict[str, dict[str, Any]]:
+    global _RESOLUTION_CACHE
+    if _RESOLUTION_CACHE is None:
+        path = _resolution_cache_path()
+        payload: Any = {}
+        if path.exists():
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                payload = {}
+        _RESOLUTION_CACHE = payload if isinstance(payload, dict) else {}
+    return _RESOLUTION_CACHE
+
+
+def save_resolution_cache() -> None:
+    global _RESOLUTION_DIRTY
+    with _RESOLUTION_LOCK:
+        if not _RESOLUTION_DIRTY or _RESOLUTION_CACHE is None:
+            return
+        path = _resolution_cache_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(_RESOLUTION_CACHE, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        _RESOLUTION_DIRTY = False
+
+
+def resolve_redirect(url: str) -> str:
+    global _RESOLUTION_DIRTY
+    host = (urlparse(url).hostname or "").lower()
+    if host not in SHORTENER_HOSTS:
+        return url
+    now = datetime.now(timezone.utc)
+    with _RESOLUTION_LOCK:
+        cached = _resolution_cache().get(url)
+    if isinstance(cached, dict):
+        if cached.get("ok"):
+            return str(cached.get("final") or url)
+        retry_at = cached.get("retry_at", "")
+        if retry_at and datetime.fromisoformat(retry_at) > now:
+            return url
+
+    timeout = max(1.0, float(os.getenv("CANONICAL_RESOLVE_TIMEOUT", "5")))
+    try:
+        resp = requests.head(url, allow_redirects=True, timeout=timeout)
+        if resp.status_code >= 400 or not resp.url:
+            raise requests.HTTPError(f"status {resp.status_code}")
+        entry = {"ok": True, "final": resp.url, "resolved_at": now.isoformat()}
+    except Exception:
+        entry = {"ok": False, "retry_at": (now + timedelta(days=1)).isoformat()}
+    with _RESOLUTION_LOCK:
+        _resolution_cache()[url] = entry
+        _RESOLUTION_DIRTY = True
+    return str(entry.get("final") or url)
+
+
+def canonicalize_url(url: str, resolve: bool = False) -> str:
+    cleaned = clean_url(url)
+    if resolve and cleaned and os.getenv("CANONICAL_RESOLVE_REDIRECTS", "1") != "0":
+        resolved = resolve_redirect(cleaned)
+        if resolved != cleaned:
+            return clean_url(resolved)
+    return cleaned
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import codecs
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any
+
+import requests
+from requests.compat import chardet
+
+from pipeline.canonical import canonicalize_url
+from pipeline.ingest import RSS_USER_AGENT
+
+
+SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg"}
+BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "li", "pre", "blockquote"}
+SCOPE_TAGS = {"article", "main"}
+_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+
+
+class _MainTextParser(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.scope_depth = 0
+        self.blocks: list[str] = []
+        self.current: list[str] = []
+        self.scoped: list[str] = []
+        self.unscoped: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in SCOPE_TAGS:
+            self._flush()
+            self.scope_depth += 1
+        elif tag in BLOCK_TAGS:
+            # A new block ends the text so far; like browsers, it also closes
+            # an open <p>, and a new <li> closes the previous one.
+            self._flush()
+            while self.blocks and self.blocks[-1] == "p":
+                self.blocks.pop()
+            if tag == "li" and self.blocks and self.blocks[-1] == "li":
+                self.blocks.pop()
+            self.blocks.append(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in SCOPE_TAGS:
+            self._flush()
+            self.scope_depth = max(0, self.scope_depth - 1)
+        elif tag in BLOCK_TAGS and tag in self.blocks:
+            self._flush()
+            while self.blocks.pop() != tag:
+                pass
+
+    def handle_data(self, data: str) -> None:
+        if self.blocks and not self.skip_depth:
+            self.current.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+    def _flush(self) -> None:
+        text = re.sub(r"\s+", " ", "".join(self.current)).strip()
+        self.current = []
+        if len(text) < 40:
+            return
+        (self.scoped if self.scope_depth else self.unscoped).append(text)
+
+    def main_text(self) -> str:
+        return "\n".join(self.scoped or self.unscoped)
+
+
+def extract_main_text(html: str, max_chars: int) -> str:
+    parser = _MainTextParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        return ""
+    return parser.main_text()[:max_chars]
+
+
+def _cache_dir() -> Path:
+    return Path(__file__).resolve().parents[2] / "outputs" / "article_cache"
+
+
+def _cache_file(url: str) -> Path:
+    return _cache_dir() / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+
+def _read_cache(url: str, now: datetime) -> dict[str, Any] | None:
+    path = _cache_file(url)
+    if not path.exists():
+        return None
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        expires_at = datetime.fromisoformat(str(payload.get("expires_at", "")))
+    except (json.JSONDecodeError, ValueError):
+        return None
+    return payload if expires_at > now else None
+
+
+def _write_cache(url: str, text: str, status: str, ttl: timedelta) -> None:
+    now = datetime.now(timezone.utc)
+    path = _cache_file(url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(
+            {
+                "url": url,
+                "status": status,
+                "text": text,
+                "fetched_at": now.isoformat(),
+                "expires_at": (now + ttl).isoformat(),
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+
+
+def _known_encoding(name: str | None) -> str | None:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+
+
+def _html_encoding(content_type: str, body: bytes) -> str:
+    # requests assumes ISO-8859-1 for text/html without a charset, which
+    # garbles UTF-8 and CJK pages; only an explicit charset is trusted.
+    match = _CHARSET.search(content_type)
+    encoding = _known_encoding(match.group(1) if match else None)
+    if encoding is None:
+        match = _META_CHARSET.search(body[:4096])
+        encoding = _known_encoding(match.group(1).decode("ascii", errors="ignore") if match else None)
+    if encoding is not None:
+        return encoding
+    try:
+        body.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as exc:
+        # A multi-byte character cut by max_bytes is still UTF-8.
+        if exc.start >= len(body) - 3:
+            return "utf-8"
+    detected = chardet.detect(body).get("encoding") if chardet is not None else None
+    return _known_encoding(detected) or "utf-8"
+
+
+def _fetch_article(
+    url: str, timeout: float, max_bytes: int, max_chars: int, deadline: float
+) -> str:
+    # Read timeouts are per socket read, so a slow drip would never trip them;
+    # the body download also stops at the per-article timeout or the budget.
+    deadline = min(deadline, time.monotonic() + timeout)
+    with requests.get(
+        url, headers={"User-Agent": RSS_USER_AGENT}, timeout=timeout, stream=True
+    ) as resp:
+        resp.raise_for_status()
+        content_type = resp.headers.get("Content-Type", "text/html")
+        if "html" not in content_type.lower():
+            return ""
+        chunks: list[bytes] = []
+        size = 0
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            if time.monotonic() > deadline:
+                raise TimeoutError("article download exceeded its time limit")
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                break
+    body = b"".join(chunks)
+    html = body.decode(_html_encoding(content_type, body), errors="replace")
+    return extract_main_text(html, max_chars)
+
+
+def enrich_articles(items: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    workers = max(1, int(os.getenv("ENRICH_WORKERS", "4")))
+    budget = max(1.0, float(os.getenv("ENRICH_TIME_BUDGET", "60")))
+    timeout = max(1.0, float(os.getenv("ENRICH_FETCH_TIMEOUT", "15")))
+    min_chars = max(0, int(os.getenv("ENRICH_MIN_CONTENT_CHARS", "600")))
+    max_chars = max(500, int(os.getenv("ENRICH_MAX_CHARS", "6000")))
+    max_bytes = max(64 * 1024, int(os.getenv("ENRICH_MAX_BYTES", str(2 * 1024 * 1024))))
+    ttl = timedelta(hours=max(1, int(os.getenv("ENRICH_CACHE_TTL_HOURS", "168"))))
+    failure_ttl = timedelta(hours=max(1, int(os.getenv("ENRICH_FAILURE_TTL_HOURS", "24"))))
+
+    now = datetime.now(timezone.utc)
+    out = [dict(x) for x in items]
+    pending: dict[str, list[int]] = {}
+    cache_hits = 0
+    for idx, item in enumerate(out):
+        if item.get("origin_type") != "rss":
+            continue
+        if len(re.sub(r"<[^>]+>", "", str(item.get("content", "")))) >= min_chars:
+            continue
+        url = canonicalize_url(str(item.get("link", "")))
+        if not url:
+            continue
+        cached = _read_cache(url, now)
+        if cached is not None:
+            cache_hits += 1
+            if cached.get("text"):
+                item["article_text"] = cached["text"]
+            continue
+        pending.setdefault(url, []).append(idx)
+
+    fetched = 0
+    failed = 0
+    started = time.monotonic()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    futures = {
+        pool.submit(_fetch_article, url, timeout, max_bytes, max_chars, started + budget): url
+        for url in pending
+    }
+    not_done = set(futures)
+    while not_done:
+        remaining = budget - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        done, not_done = wait(not_done, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            url = futures[future]
+            try:
+                text = future.result()
+            except Exception as exc:
+                failed += 1
+                _write_cache(url, "", f"error: {type(exc).__name__}", failure_ttl)
+                continue
+            fetched += 1
+            _write_cache(url, text, "ok" if text else "empty", ttl)
+            for idx in pending[url]:
+                if text:
+                    out[idx]["article_text"] = text
+    # Whatever is still in flight when the budget runs out is abandoned; those
+    # items keep their feed summary and are retried on a later run.
+    pool.shutdown(wait=False, cancel_futures=True)
+    if not_done:
+        print(f"[WARN] Enrichment time budget reached; skipped {len(not_done)} articles.")
+
+    enrich_meta = {
+        "enrich_cache_hits": cache_hits,
+        "enrich_fetched": fetched,
+        "enrich_failed": failed,
+        "enrich_skipped_budget": len(not_done),
+        "enrich_seconds": round(time.monotonic() - started, 2),
+    }
+    return out, enrich_meta
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from typing import Any, Iterable, Iterator
+from urllib.parse import urljoin
+
+import feedparser
+
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+CONTENT_NS = "{http://purl.org/rss/1.0/modules/content/}"
+DC_NS = "{http://purl.org/dc/elements/1.1/}"
+
+
+def _text(elem: ET.Element | None) -> str:
+    if elem is None:
+        return ""
+    return "".join(elem.itertext()).strip()
+
+
+def _rss_entry(elem: ET.Element, base_url: str) -> dict[str, Any]:
+    link = _text(elem.find("link"))
+    guid = elem.find("guid")
+    if not link and guid is not None and guid.get("isPermaLink", "true") != "false":
+        link = _text(guid)
+    return {
+        "id": _text(guid) or link,
+        "title": _text(elem.find("title")),
+        "link": urljoin(base_url, link) if link else "",
+        "summary": _text(elem.find("description")) or _text(elem.find(f"{CONTENT_NS}encoded")),
+        "published": _text(elem.find("pubDate")) or _text(elem.find(f"{DC_NS}date")),
+        "author": _text(elem.find("author")) or _text(elem.find(f"{DC_NS}creator")),
+    }
+
+
+def _atom_entry(elem: ET.Element, base_url: str) -> dict[str, Any]:
+    link = ""
+    for node in elem.findall(f"{ATOM_NS}link"):
+        if node.get("rel", "alternate") == "alternate" and node.get("href"):
+            link = node.get("href", "")
+            break
+    return {
+        "id": _text(elem.find(f"{ATOM_NS}id")) or link,
+        "title": _text(elem.find(f"{ATOM_NS}title")),
+        "link": urljoin(base_url, link) if link else "",
+        "summary": _text(elem.find(f"{ATOM_NS}summary")) or _text(elem.find(f"{ATOM_NS}content")),
+        "published": _text(elem.find(f"{ATOM_NS}published")),
+        "updated": _text(elem.find(f"{ATOM_NS}updated")),
+        "author": _text(elem.find(f"{ATOM_NS}author/{ATOM_NS}name")),
+    }
+
+
+def stream_entries(
+    chunks: Iterable[bytes], max_entries: int, base_url: str = ""
+) -> tuple[list[dict[str, Any]] | None, bytes]:
+    # Returns (None, body) when the document is not well-formed RSS 2.0/Atom;
+    # body then holds every byte read so the caller can hand it to feedparser.
+    parser = ET.XMLPullParser(events=("start", "end"))
+    buffered: list[bytes] = []
+    entries: list[dict[str, Any]] = []
+    kind = ""
+    iterator: Iterator[bytes] = iter(chunks)
+    try:
+        for chunk in iterator:
+            buffered.append(chunk)
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    if not kind:
+                        if elem.tag == "rss":
+                            kind = "rss"
+                        elif elem.tag == f"{ATOM_NS}feed":
+                            kind = "atom"
+                        else:
+                            raise ET.ParseError(f"unsupported feed root: {elem.tag}")
+                    continue
+                if kind == "rss" and elem.tag == "item":
+                    entries.append(_rss_entry(elem, base_url))
+                elif kind == "atom" and elem.tag == f"{ATOM_NS}entry":
+                    entries.append(_atom_entry(elem, base_url))
+                else:
+                    continue
+                elem.clear()
+                if len(entries) >= max_entries:
+                    return entries, b""
+    except ET.ParseError:
+        buffered.extend(iterator)
+        return None, b"".join(buffered)
+    try:
+        parser.close()
+    except ET.ParseError:
+        # EOF inside the document: the body was cut at the size cap.
+        if entries:
+            return entries, b""
+        return None, b"".join(buffered)
+    if kind:
+        return entries, b""
+    return None, b"".join(buffered)
+
+
+def parse_entries(
+    chunks: Iterable[bytes],
+    max_entries: int,
+    base_url: str = "",
+    content_type: str = "",
+) -> tuple[list[Any], str]:
+    entries, body = stream_entries(chunks, max_entries, base_url=base_url)
+    if entries is not None:
+        return entries, "stream"
+    feed = feedparser.parse(
+        body,
+        response_headers={"content-location": base_url, "content-type": content_type},
+    )
+    return list(feed.entries or [])[:max_entries], "feedparser"
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import requests
+
+
+class GitHubBudgetExhausted(RuntimeError):
+    pass
+
+
+def _state_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "outputs" / "github_rate_limit.json"
+
+
+class GitHubRateGovernor:
+    # Tracks X-RateLimit-* per resource ("search", "core", ...) and persists it
+    # so phase1 ingest and the phase2 agent share one view of the budget.
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path or _state_path()
+        self.reserve = max(0, int(os.getenv("GITHUB_RATE_RESERVE", "1")))
+        self.max_wait = max(0.0, float(os.getenv("GITHUB_RATE_MAX_WAIT", "60")))
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return {}
+        return payload if isinstance(payload, dict) else {}
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._state, indent=2), encoding="utf-8")
+
+    def _wait_seconds(self, resource: str) -> float:
+        state = self._state.get(resource)
+        if not isinstance(state, dict):
+            return 0.0
+        now = time.time()
+        reset_at = float(state.get("reset", 0) or 0)
+        if reset_at <= now:
+            self._state.pop(resource, None)
+            return 0.0
+        if int(state.get("remaining", 0) or 0) > self.reserve:
+            return 0.0
+        return reset_at - now + 1
+
+    def is_exhausted(self, resource: str) -> bool:
+        with self._lock:
+            return self._wait_seconds(resource) > 0
+
+    def acquire(self, resource: str) -> None:
+        while True:
+            with self._lock:
+                wait = self._wait_seconds(resource)
+                if wait <= 0:
+                    state = self._state.get(resource)
+                    if isinstance(state, dict):
+                        state["remaining"] = int(state.get("remaining", 0) or 0) - 1
+                    return
+            if wait > self.max_wait:
+                raise GitHubBudgetExhausted(
+                    f"GitHub {resource} rate limit budget exhausted; resets in {int(wait)}s"
+                )
+            print(f"[INFO] GitHub {resource} budget low, waiting {int(wait)}s for reset.")
+            time.sleep(wait)
+
+    def update(self, resource: str, resp: requests.Response) -> None:
+        headers = resp.headers
+        resource = headers.get("X-RateLimit-Resource") or resource
+        with self._lock:
+            state: dict[str, Any] = dict(self._state.get(resource) or {})
+            if headers.get("X-RateLimit-Remaining") is not None:
+                state["remaining"] = int(headers["X-RateLimit-Remaining"])
+                state["limit"] = int(headers.get("X-RateLimit-Limit", 0) or 0)
+                state["reset"] = float(headers.get("X-RateLimit-Reset", 0) or 0)
+            if resp.status_code in {403, 429} and (
+                headers.get("Retry-After") or state.get("remaining") == 0
+            ):
+                state["remaining"] = 0
+                retry_after = float(headers.get("Retry-After", 0) or 0)
+                state["reset"] = max(float(state.get("reset", 0) or 0), time.time() + retry_after)
+            if not state:
+                return
+            state["updated_at"] = time.time()
+            self._state[resource] = state
+            self._save()
+
+
+_GOVERNOR: GitHubRateGovernor | None = None
+_GOVERNOR_LOCK = threading.Lock()
+
+
+def get_governor() -> GitHubRateGovernor:
+    global _GOVERNOR
+    with _GOVERNOR_LOCK:
+        if _GOVERNOR is None:
+            _GOVERNOR = GitHubRateGovernor()
+        return _GOVERNOR
@@ -1,98 +1,458 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Any
-from urllib.parse import urlparse, urlunparse
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Iterator
+from urllib.parse import urlparse
 
-import feedparser
 import requests
 
-from config import GITHUB_SEARCH_ENDPOINT, RSS_SOURCES, github_query_for_recent
+from config import (
+    GITHUB_QUERIES,
+    GITHUB_SEARCH_ENDPOINT,
+    RssSource,
+    github_query_for_window,
+)
+from pipeline.canonical import canonicalize_url, save_resolution_cache
+from pipeline.feedparse import parse_entries
+from pipeline.github_rate import get_governor
+from pipeline.sources import (
+    active_sources,
+    adaptive_depths,
+    load_registry,
+    record_fetch,
+    save_registry,
+)
 
 
-def canonicalize_url(url: str) -> str:
+RSS_USER_AGENT = "AI-News-Monitor/1.0 (+https://github.com/Zack0303/AI-News-Monitor)"
+GITHUB_SEARCH_MAX_RESULTS = 1000
+GITHUB_MAX_PER_PAGE = 100
+
+
+@dataclass
+class FeedFetch:
+    entries: list[Any] | None
+    validators: dict[str, str] = field(default_factory=dict)
+    parser: str = ""
+    seconds: float = 0.0
+    items: list[dict[str, Any]] = field(default_factory=list)
+
+
+def parse_timestamp(value: Any) -> datetime | None:
+    raw = str(value or "").strip()
+    if not raw:
+        return None
+    try:
+        dt = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            dt = parsedate_to_datetime(raw)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _entry_timestamp(entry: Any) -> datetime | None:
+    for key in ("published", "updated"):
+        parsed = parse_timestamp(entry.get(key))
+        if parsed:
+            return parsed
+    # feedparser normalizes odd date formats into UTC struct_time values.
+    for key in ("published_parsed", "updated_parsed"):
+        value = entry.get(key)
+        if value:
+            try:
+                return datetime(*value[:6], tzinfo=timezone.utc)
+            except (TypeError, ValueError):
+                continue
+    return None
+
+
+def _max_age_days(max_age_days: int | None) -> int:
+    if max_age_days is None:
+        max_age_days = int(os.getenv("MAX_ITEM_AGE_DAYS", "14"))
+    return max(0, max_age_days)
+
+
+def _max_age_cutoff(max_age_days: int) -> datetime | None:
+    if max_age_days <= 0:
+        return None
+    return datetime.now(timezone.utc) - timedelta(days=max_age_days)
+
+
+def _is_stale(item: dict[str, Any], cutoff: datetime | None) -> bool:
+    if cutoff is None or item.get("published_inferred"):
+        return False
+    published = parse_timestamp(item.get("published_at"))
+    return published is not None and published < cutoff
+
+
+def _feed_cache_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "outputs" / "rss_feed_cache.json"
+
+
+def _load_feed_cache() -> dict[str, dict[str, Any]]:
+    path = _feed_cache_path()
+    if not path.exists():
+        return {}
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def _save_feed_cache(cache: dict[str, dict[str, Any]]) -> None:
+    path = _feed_cache_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _host(url: str) -> str:
     try:
-        p = urlparse(url.strip())
-        clean = p._replace(query="", fragment="")
-        return urlunparse(clean)
+        return (urlparse(url).netloc or "").lower()
     except Exception:
-        return url.strip()
+        return ""
+
+
+def _iter_body(resp: requests.Response, deadline: float, max_bytes: int) -> Iterator[bytes]:
+    size = 0
+    for chunk in resp.iter_content(chunk_size=64 * 1024):
+        if time.monotonic() > deadline:
+            raise TimeoutError("feed download exceeded per-feed timeout")
+        size += len(chunk)
+        if size > max_bytes:
+            print(f"[WARN] Feed body truncated at {max_bytes} bytes: {resp.url}")
+            yield chunk[: len(chunk) - (size - max_bytes)]
+            return
+        yield chunk
+
+
+def _fetch_feed(
+    source: RssSource,
+    timeout: float,
+    host_limits: dict[str, threading.BoundedSemaphore],
+    validators: dict[str, str],
+    max_entries: int,
+    max_bytes: int,
+) -> FeedFetch:
+    headers = {"User-Agent": RSS_USER_AGENT}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    with host_limits[_host(source.url)]:
+        started = time.monotonic()
+        deadline = started + timeout
+        with requests.get(source.url, headers=headers, timeout=timeout, stream=True) as resp:
+            if resp.status_code == 304:
+                return FeedFetch(None, validators, "not_modified", time.monotonic() - started)
+            resp.raise_for_status()
+            entries, parser_name = parse_entries(
+                _iter_body(resp, deadline, max_bytes),
+                max_entries,
+                base_url=source.url,
+                content_type=resp.headers.get("Content-Type", ""),
+            )
+            fresh_validators = {
+                "etag": resp.headers.get("ETag", ""),
+                "last_modified": resp.headers.get("Last-Modified", ""),
+            }
+        seconds = time.monotonic() - started
+    # Items (and their short-link HEAD requests) are built here, in the worker
+    # and outside the host slot, so resolution runs in parallel across feeds.
+    items = _feed_items(source, entries, max_entries)
+    return FeedFetch(entries, fresh_validators, parser_name, seconds, items)
 
 
-def fetch_rss_items(max_items_per_source: int) -> list[dict[str, Any]]:
+def _feed_items(
+    source: RssSource, entries: list[Any], max_items_per_source: int
+) -> list[dict[str, Any]]:
     items: list[dict[str, Any]] = []
-    for source in RSS_SOURCES:
-        try:
-            feed = feedparser.parse(source.url)
-        except Exception as exc:
-            print(f"[WARN] RSS source failed: {source.name}: {exc}")
+    for entry in entries[:max_items_per_source]:
+        title = (entry.get("title") or "").strip()
+        link = canonicalize_url(entry.get("link", ""), resolve=True)
+        summary = (entry.get("summary") or entry.get("description") or "").strip()
+        published = _entry_timestamp(entry)
+        if not title or not link:
             continue
-        for entry in (feed.entries or [])[:max_items_per_source]:
-            title = (entry.get("title") or "").strip()
-            link = canonicalize_url(entry.get("link", ""))
-            summary = (entry.get("summary") or entry.get("description") or "").strip()
-            published = (
-                entry.get("published")
-                or entry.get("updated")
-                or datetime.now(timezone.utc).isoformat()
-            )
-            if not title or not link:
+        items.append(
+            {
+                "id": f"rss::{source.name}::{link}",
+                "source": source.name,
+                "title": title,
+                "link": link,
+                "content": summary,
+                "author": entry.get("author", ""),
+                "published_at": (published or datetime.now(timezone.utc)).isoformat(),
+                "published_inferred": published is None,
+                "origin_type": "rss",
+            }
+        )
+    return items
+
+
+def fetch_rss_items(
+    max_items_per_source: int,
+    probe_all_sources: bool = False,
+    adaptive_depth: bool = True,
+    max_age_days: int | None = None,
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    workers = max(1, int(os.getenv("RSS_FETCH_WORKERS", "8")))
+    timeout = max(1.0, float(os.getenv("RSS_FETCH_TIMEOUT", "20")))
+    per_host = max(1, int(os.getenv("RSS_MAX_PER_HOST", "2")))
+    max_bytes = max(64 * 1024, int(os.getenv("RSS_MAX_FEED_BYTES", str(5 * 1024 * 1024))))
+
+    registry = load_registry()
+    sources, skipped = active_sources(registry, include_unhealthy=probe_all_sources)
+    if adaptive_depth:
+        depth_by_url = adaptive_depths(registry, max_items_per_source)
+    else:
+        depth_by_url = {}
+    depths = [depth_by_url.get(s.url, max_items_per_source) for s in sources]
+    host_limits = {
+        host: threading.BoundedSemaphore(per_host) for host in {_host(s.url) for s in sources}
+    }
+    feed_cache = _load_feed_cache()
+
+    def _validators_for(source: RssSource, depth: int) -> dict[str, str]:
+        cached = feed_cache.get(source.url)
+        # A cache entry parsed at a shallower depth cannot serve a deeper
+        # request, so skip the conditional headers and refetch in full.
+        if not isinstance(cached, dict) or int(cached.get("depth", 0)) < depth:
+            return {}
+        return {
+            "etag": str(cached.get("etag", "")),
+            "last_modified": str(cached.get("last_modified", "")),
+        }
+
+    # Results are slotted by source index so output order never depends on
+    # which feed answered first.
+    per_source: list[list[dict[str, Any]]] = [[] for _ in sources]
+    failed: list[int] = []
+    not_modified = 0
+    fallback_parsed = 0
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(sources)))) as pool:
+        futures = {
+            pool.submit(
+                _fetch_feed,
+                source,
+                timeout,
+                host_limits,
+                _validators_for(source, depths[idx]),
+                depths[idx],
+                max_bytes,
+            ): idx
+            for idx, source in enumerate(sources)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            source = sources[idx]
+            try:
+                fetched = future.result()
+            except Exception as exc:
+                failed.append(idx)
+                print(f"[WARN] RSS source failed: {source.name}: {exc}")
                 continue
-            items.append(
-                {
-                    "id": f"rss::{source.name}::{link}",
-                    "source": source.name,
-                    "title": title,
-                    "link": link,
-                    "content": summary,
-                    "author": entry.get("author", ""),
-                    "published_at": str(published),
-                    "origin_type": "rss",
-                }
+            if fetched.entries is None:
+                not_modified += 1
+                record_fetch(registry, source, ok=True, latency=fetched.seconds)
+                cached_items = feed_cache[source.url].get("items", []) or []
+                per_source[idx] = [x for x in cached_items if isinstance(x, dict)][: depths[idx]]
+                continue
+            if fetched.parser == "feedparser":
+                fallback_parsed += 1
+            per_source[idx] = fetched.items
+            published = [parse_timestamp(x.get("published_at")) for x in per_source[idx]]
+            record_fetch(
+                registry,
+                source,
+                ok=True,
+                latency=fetched.seconds,
+                entries=len(per_source[idx]),
+                newest_entry_at=max([x for x in published if x], default=None),
             )
-    return items
+            if fetched.validators.get("etag") or fetched.validators.get("last_modified"):
+                feed_cache[source.url] = {
+                    **fetched.validators,
+                    "depth": depths[idx],
+                    "items": per_source[idx],
+                    "fetched_at": datetime.now(timezone.utc).isoformat(),
+                }
+            else:
+                feed_cache.pop(source.url, None)
+
+    # Failures are penalized only once the run's outcome is known: when every
+    # source (of at least two) failed, the outage is ours, not theirs.
+    outage = len(sources) >= 2 and len(failed) == len(sources)
+    if outage:
+        print(f"[WARN] All {len(sources)} RSS sources failed; source health left unchanged.")
+    for idx in sorted(failed):
+        record_fetch(registry, sources[idx], ok=False, outage=outage)
+    save_registry(registry)
+    save_resolution_cache()
+    _save_feed_cache(feed_cache)
+    max_age_days = _max_age_days(max_age_days)
+    cutoff = _max_age_cutoff(max_age_days)
+    fetched_items = [item for chunk in per_source for item in chunk]
+    items = [item for item in fetched_items if not _is_stale(item, cutoff)]
+    ingest_meta = {
+        "rss_sources": len(sources),
+        "rss_sources_skipped": skipped,
+        "rss_sources_failed": len(failed),
+        "rss_fetch_outage": outage,
+        "rss_sources_not_modified": not_modified,
+        "rss_sources_feedparser_fallback": fallback_parsed,
+        "rss_fetch_depth_total": sum(depths),
+        "rss_fetch_seconds": round(time.monotonic() - started, 2),
+        "rss_items_stale": len(fetched_items) - len(items),
+        "rss_items_inferred_time": sum(1 for x in items if x.get("published_inferred")),
+        "max_item_age_days": max_age_days,
+    }
+    return items, ingest_meta
 
 
-def fetch_github_items(limit: int, token: str | None) -> list[dict[str, Any]]:
-    headers = {"Accept": "application/vnd.github+json"}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
+def _github_search_page(
+    query: str, page: int, per_page: int, headers: dict[str, str]
+) -> tuple[dict[str, Any] | None, Exception | None]:
     params = {
-        "q": github_query_for_recent(days=7),
+        "q": query,
         "sort": "stars",
         "order": "desc",
-        "per_page": min(limit, 50),
-        "page": 1,
+        "per_page": per_page,
+        "page": page,
     }
-    resp = requests.get(
-        GITHUB_SEARCH_ENDPOINT, params=params, headers=headers, timeout=30
+    governor = get_governor()
+    try:
+        governor.acquire("search")
+        resp = requests.get(GITHUB_SEARCH_ENDPOINT, params=params, headers=headers, timeout=30)
+        governor.update("search", resp)
+        resp.raise_for_status()
+        return resp.json(), None
+    except Exception as exc:
+        return None, exc
+
+
+def _github_item(repo: dict[str, Any]) -> dict[str, Any]:
+    link = canonicalize_url(repo.get("html_url", ""))
+    name = repo.get("full_name", "unknown/repo")
+    title = f"{name} (GitHub)"
+    desc = repo.get("description") or ""
+    stars = int(repo.get("stargazers_count", 0))
+    forks = int(repo.get("forks_count", 0))
+    pushed = parse_timestamp(repo.get("pushed_at"))
+    pushed_at = pushed.isoformat() if pushed else ""
+    content = (
+        f"{desc}\nStars: {stars}\nForks: {forks}\n"
+        f"Language: {repo.get('language')}\nLast push: {pushed_at}"
     )
-    resp.raise_for_status()
-    payload = resp.json()
-    items: list[dict[str, Any]] = []
-    for repo in payload.get("items", [])[:limit]:
-        link = canonicalize_url(repo.get("html_url", ""))
-        name = repo.get("full_name", "unknown/repo")
-        title = f"{name} (GitHub)"
-        desc = repo.get("description") or ""
-        stars = int(repo.get("stargazers_count", 0))
-        forks = int(repo.get("forks_count", 0))
-        pushed_at = repo.get("pushed_at", "")
-        content = (
-            f"{desc}\nStars: {stars}\nForks: {forks}\n"
-            f"Language: {repo.get('language')}\nLast push: {pushed_at}"
-        )
-        items.append(
-            {
-                "id": f"github::{name}",
-                "source": "GitHub Search",
-                "title": title,
-                "link": link,
-                "content": content,
-                "author": (repo.get("owner") or {}).get("login", ""),
-                "published_at": pushed_at or datetime.now(timezone.utc).isoformat(),
-                "origin_type": "github",
-            }
+    return {
+        "id": f"github::{name}",
+        "source": "GitHub Search",
+        "title": title,
+        "link": link,
+        "content": content,
+        "author": (repo.get("owner") or {}).get("login", ""),
+        "published_at": pushed_at or datetime.now(timezone.utc).isoformat(),
+        "published_inferred": pushed is None,
+        "origin_type": "github",
+    }
+
+
+def fetch_github_items(
+    limit: int, token: str | None, max_age_days: int | None = None
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    headers = {"Accept": "application/vnd.github+json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    templates = [
+        q.strip() for q in (os.getenv("GITHUB_QUERIES") or "").split(";") if q.strip()
+    ] or list(GITHUB_QUERIES)
+    lookback_days = max(1, int(os.getenv("GITHUB_LOOKBACK_DAYS", "7")))
+    workers = max(1, int(os.getenv("GITHUB_FETCH_WORKERS", "4")))
+
+    limit = max(1, limit)
+    per_page = min(limit, GITHUB_MAX_PER_PAGE)
+    max_pages = min(
+        math.ceil(limit / per_page), GITHUB_SEARCH_MAX_RESULTS // per_page
+    )
+    today = datetime.now(timezone.utc).date()
+    since = today - timedelta(days=lookback_days)
+
+    repos: list[dict[str, Any]] = []
+    errors: list[Exception] = []
+    requests_made = 0
+    leaves: list[tuple[str, int]] = []
+    pending: list[tuple[str, date, date]] = [(t, since, today) for t in templates]
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # First pages tell us each window's total_count; a window whose
+        # matches exceed the search API's 1000-result cap is bisected by
+        # date until every shard can be paged through completely.
+        while pending:
+            queries = [github_query_for_window(t, start, end) for t, start, end in pending]
+            results = list(
+                pool.map(lambda q: _github_search_page(q, 1, per_page, headers), queries)
+            )
+            requests_made += len(queries)
+            next_pending: list[tuple[str, date, date]] = []
+            for (template, start, end), query, (payload, exc) in zip(pending, queries, results):
+                if exc is not None or payload is None:
+                    errors.append(exc or ValueError("empty GitHub search payload"))
+                    continue
+                total = int(payload.get("total_count", 0) or 0)
+                if limit > GITHUB_SEARCH_MAX_RESULTS and total > GITHUB_SEARCH_MAX_RESULTS and start < end:
+                    mid = start + (end - start) // 2
+                    next_pending.extend(
+                        [(template, start, mid), (template, mid + timedelta(days=1), end)]
+                    )
+                    continue
+                repos.extend(payload.get("items", []) or [])
+                pages = min(max_pages, math.ceil(min(total, GITHUB_SEARCH_MAX_RESULTS) / per_page))
+                leaves.extend((query, page) for page in range(2, pages + 1))
+            pending = next_pending
+
+        results = list(
+            pool.map(lambda leaf: _github_search_page(leaf[0], leaf[1], per_page, headers), leaves)
         )
-    return items
+        requests_made += len(leaves)
+        for payload, exc in results:
+            if exc is not None or payload is None:
+                errors.append(exc or ValueError("empty GitHub search payload"))
+                continue
+            repos.extend(payload.get("items", []) or [])
+
+    if errors and not repos:
+        raise errors[0]
+    for exc in errors[:3]:
+        print(f"[WARN] GitHub search page failed: {exc}")
 
+    by_name: dict[str, dict[str, Any]] = {}
+    for repo in repos:
+        by_name.setdefault(str(repo.get("full_name", "")), repo)
+    merged = sorted(
+        by_name.values(), key=lambda r: int(r.get("stargazers_count", 0) or 0), reverse=True
+    )
+    cutoff = _max_age_cutoff(_max_age_days(max_age_days))
+    fresh = [item for item in map(_github_item, merged) if not _is_stale(item, cutoff)]
+    items = fresh[:limit]
+    github_meta = {
+        "github_queries": len(templates),
+        "github_requests": requests_made,
+        "github_requests_failed": len(errors),
+        "github_items_stale": len(merged) - len(fresh),
+        "github_fetch_seconds": round(time.monotonic() - started, 2),
+    }
+    return items, github_meta
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Iterable
+
+
+# Below this size CPython's C substring search (one `k in text` per keyword)
+# beats any regex; above it the trie regex's per-position cost wins because it
+# no longer grows with the number of keywords (see scripts/bench_heuristic.py).
+TRIE_MIN_KEYWORDS = 150
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    trie: dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: dict[str, Any]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail: the longest keyword at a position matches first.
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    # matches(text) == {k for k in keywords if k in text}, computed either by
+    # direct substring checks (small sets) or one pass of a trie-shaped regex.
+
+    def __init__(self, keywords: Iterable[str], trie_min: int = TRIE_MIN_KEYWORDS) -> None:
+        ordered = sorted({k for k in keywords if k}, key=lambda k: (-len(k), k))
+        self.keywords = tuple(ordered)
+        self._pattern: re.Pattern[str] | None = None
+        if len(ordered) >= trie_min:
+            # The lookahead tries every start offset, so overlapping keywords
+            # are all reported; each hit also credits the keywords it contains.
+            self._pattern = re.compile(f"(?=({_trie_pattern(ordered)}))")
+            self._closure = {k: frozenset(o for o in ordered if o in k) for k in ordered}
+
+    def matches(self, text: str) -> set[str]:
+        if self._pattern is None:
+            return {k for k in self.keywords if k in text}
+        found: set[str] = set()
+        for hit in set(self._pattern.findall(text)):
+            found |= self._closure[hit]
+        return found
+
+    def count(self, text: str) -> int:
+        if self._pattern is None:
+            return sum(map(text.__contains__, self.keywords))
+        return len(self.matches(text))
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+
+def _cache_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "outputs" / "llm_cache.json"
+
+
+def cache_key(item_id: str, content_hash: str, model: str, prompt_version: str) -> str:
+    raw = "\x1f".join([item_id, content_hash, model, prompt_version])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def content_hash(payload: dict[str, Any]) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def load_llm_cache(now: datetime | None = None) -> dict[str, dict[str, Any]]:
+    path = _cache_path()
+    if not path.exists():
+        return {}
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(payload, dict):
+        return {}
+    now = now or datetime.now(timezone.utc)
+    return {
+        k: v
+        for k, v in payload.items()
+        if isinstance(v, dict) and str(v.get("expires_at", "")) > now.isoformat()
+    }
+
+
+def save_llm_cache(cache: dict[str, dict[str, Any]]) -> None:
+    max_entries = max(100, int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")))
+    # Evict least recently used entries once the cache outgrows its cap.
+    entries = sorted(
+        cache.items(), key=lambda kv: str(kv[1].get("used_at", "")), reverse=True
+    )[:max_entries]
+    path = _cache_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(dict(entries), ensure_ascii=False), encoding="utf-8")
+
+
+def get_cached(
+    cache: dict[str, dict[str, Any]], key: str, now: datetime | None = None
+) -> dict[str, Any] | None:
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    entry["used_at"] = (now or datetime.now(timezone.utc)).isoformat()
+    result = entry.get("result")
+    return result if isinstance(result, dict) else None
+
+
+def put_cached(
+    cache: dict[str, dict[str, Any]],
+    key: str,
+    result: dict[str, Any],
+    now: datetime | None = None,
+) -> None:
+    now = now or datetime.now(timezone.utc)
+    ttl = timedelta(hours=max(1, int(os.getenv("LLM_CACHE_TTL_HOURS", "168"))))
+    cache[key] = {
+        "result": result,
+        "cached_at": now.isoformat(),
+        "used_at": now.isoformat(),
+        "expires_at": (now + ttl).isoformat(),
+    }
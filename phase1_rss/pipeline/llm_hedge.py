@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+
+class LatencyTracker:
+    # Latencies of completed primary calls in this run. hedge_after() is their
+    # configured percentile, or a fixed delay until enough calls have finished.
+
+    def __init__(
+        self,
+        percentile: float,
+        default_seconds: float,
+        min_seconds: float,
+        enabled: bool = True,
+        min_samples: int = 4,
+    ) -> None:
+        self.percentile = min(0.99, max(0.5, percentile))
+        self.default_seconds = default_seconds
+        self.min_seconds = min_seconds
+        self.enabled = enabled
+        self.min_samples = min_samples
+        self._samples: list[float] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> LatencyTracker:
+        return cls(
+            percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9")),
+            default_seconds=max(0.0, float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "20"))),
+            min_seconds=max(0.0, float(os.getenv("LLM_HEDGE_MIN_SECONDS", "3"))),
+            enabled=os.getenv("LLM_HEDGE", "0").strip() == "1",
+        )
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_after(self) -> float | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return self.default_seconds
+        rank = min(len(samples) - 1, math.ceil(self.percentile * len(samples)) - 1)
+        return max(self.min_seconds, samples[rank])
+
+
+def hedged_call(
+    calls: list[tuple[str, Callable[[], Any]]],
+    pool: ThreadPoolExecutor,
+    tracker: LatencyTracker,
+    on_abandon: Callable[[str], None] | None = None,
+) -> tuple[Any, str, bool, bool]:
+    # Runs calls[0] and starts the next provider once the primary outlives the
+    # hedge delay (hedged) or every in-flight call has failed (failover); the
+    # first success wins. Losers still queued are cancelled; losers already
+    # running cannot be, so on_abandon(name) lets the caller account for them
+    # now instead of whenever they finish in the background.
+    name, primary = calls[0]
+    started = time.monotonic()
+
+    def _timed() -> Any:
+        result = primary()
+        tracker.record(time.monotonic() - started)
+        return result
+
+    pending: dict[Future[Any], str] = {pool.submit(_timed): name}
+    backups = list(calls[1:])
+    errors: list[BaseException] = []
+    hedged = False
+    failover = False
+    while pending:
+        timeout = tracker.hedge_after() if backups else None
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            provider = pending.pop(future)
+            exc = future.exception()
+            if exc is None:
+                for loser, loser_name in pending.items():
+                    if not loser.cancel() and on_abandon is not None:
+                        on_abandon(loser_name)
+                return future.result(), provider, hedged, failover
+            errors.append(exc)
+        if backups and not pending:
+            failover = True
+        elif backups and not done:
+            hedged = True
+        else:
+            continue
+        provider, call = backups.pop(0)
+        pending[pool.submit(call)] = provider
+    raise errors[0]
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0) -> None:
+        self.rate = max(1.0, per_minute) / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+        # The level may go negative: callers queue behind earlier reservations
+        # instead of racing for refills, and oversized requests still proceed.
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+
+class LlmRateLimiter:
+    # Requests-per-minute and tokens-per-minute buckets shared by all batch
+    # workers; acquire() blocks until both budgets cover the call.
+
+    def __init__(self, rpm: float, tpm: float) -> None:
+        self._requests = _TokenBucket(rpm)
+        self._tokens = _TokenBucket(tpm)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> LlmRateLimiter:
+        return cls(
+            rpm=max(1.0, float(os.getenv("LLM_RPM", "15"))),
+            tpm=max(1000.0, float(os.getenv("LLM_TPM", "1000000"))),
+        )
+
+    def acquire(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._requests.reserve(1, now), self._tokens.reserve(tokens, now))
+        if wait > 0:
+            time.sleep(wait)
+        return wait
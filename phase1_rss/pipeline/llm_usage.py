@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+
+LATENCY_BUCKETS = ((1.0, "<1s"), (2.0, "1-2s"), (5.0, "2-5s"), (10.0, "5-10s"), (30.0, "10-30s"), (60.0, "30-60s"))
+
+
+class LlmBudgetExceeded(RuntimeError):
+    pass
+
+
+def _usage_log_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "outputs" / "llm_usage.jsonl"
+
+
+def _latency_bucket(seconds: float) -> str:
+    for bound, label in LATENCY_BUCKETS:
+        if seconds < bound:
+            return label
+    return "60s+"
+
+
+def _price_per_token(provider: str, direction: str) -> float:
+    # USD per million tokens, e.g. LLM_PRICE_GEMINI_INPUT_PER_MTOK=0.1
+    raw = os.getenv(f"LLM_PRICE_{provider.upper()}_{direction}_PER_MTOK", "0")
+    return max(0.0, float(raw or 0)) / 1_000_000
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)], 2)
+
+
+def _aggregate(calls: list[dict[str, Any]]) -> dict[str, Any]:
+    latencies = [c["seconds"] for c in calls]
+    histogram = {label: 0 for _, label in LATENCY_BUCKETS} | {"60s+": 0}
+    providers: dict[str, int] = {}
+    for c in calls:
+        histogram[_latency_bucket(c["seconds"])] += 1
+        providers[c["provider"]] = providers.get(c["provider"], 0) + 1
+    return {
+        "calls": len(calls),
+        "failed": sum(1 for c in calls if not c["ok"]),
+        "input_tokens": sum(c["input_tokens"] for c in calls),
+        "output_tokens": sum(c["output_tokens"] for c in calls),
+        "cost_usd": round(sum(c["cost_usd"] for c in calls), 6),
+        "seconds": round(sum(latencies), 2),
+        "latency_p50": _percentile(latencies, 0.5) if latencies else None,
+        "latency_p90": _percentile(latencies, 0.9) if latencies else None,
+        "latency_histogram": histogram,
+        "providers": providers,
+    }
+
+
+class LlmUsage:
+    # Per-process ledger of LLM calls from every stage. check() enforces the
+    # optional token/cost budget before a call; calls already in flight when
+    # the budget runs out still complete and are recorded.
+
+    def __init__(self, token_budget: int = 0, cost_budget_usd: float = 0.0) -> None:
+        self.token_budget = token_budget
+        self.cost_budget_usd = cost_budget_usd
+        self._calls: list[dict[str, Any]] = []
+        self._blocked = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> LlmUsage:
+        return cls(
+            token_budget=max(0, int(os.getenv("LLM_TOKEN_BUDGET", "0"))),
+            cost_budget_usd=max(0.0, float(os.getenv("LLM_COST_BUDGET_USD", "0"))),
+        )
+
+    def check(self, stage: str, predicted_tokens: int = 0) -> None:
+        with self._lock:
+            tokens = sum(c["input_tokens"] + c["output_tokens"] for c in self._calls)
+            cost = sum(c["cost_usd"] for c in self._calls)
+            over_tokens = self.token_budget and tokens + predicted_tokens > self.token_budget
+            over_cost = self.cost_budget_usd and cost >= self.cost_budget_usd
+            if not (over_tokens or over_cost):
+                return
+            self._blocked += 1
+        raise LlmBudgetExceeded(
+            f"LLM budget exhausted before {stage} call: tokens={tokens}/{self.token_budget or '-'}, "
+            f"cost_usd={cost:.4f}/{self.cost_budget_usd or '-'}"
+        )
+
+    def record(
+        self,
+        stage: str,
+        provider: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        seconds: float,
+        ok: bool = True,
+    ) -> None:
+        cost = input_tokens * _price_per_token(provider, "INPUT") + output_tokens * _price_per_token(
+            provider, "OUTPUT"
+        )
+        with self._lock:
+            self._calls.append(
+                {
+                    "stage": stage,
+                    "provider": provider,
+                    "model": model,
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "seconds": seconds,
+                    "cost_usd": cost,
+                    "ok": ok,
+                }
+            )
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            calls = list(self._calls)
+            blocked = self._blocked
+        stages: dict[str, list[dict[str, Any]]] = {}
+        for c in calls:
+            stages.setdefault(c["stage"], []).append(c)
+        return {
+            "totals": _aggregate(calls),
+            "stages": {name: _aggregate(rows) for name, rows in sorted(stages.items())},
+            "token_budget": self.token_budget or None,
+            "cost_budget_usd": self.cost_budget_usd or None,
+            "calls_blocked": blocked,
+        }
+
+
+@lru_cache(maxsize=1)
+def llm_usage() -> LlmUsage:
+    return LlmUsage.from_env()
+
+
+def append_usage_log(program: str, summary: dict[str, Any] | None) -> None:
+    # One line per program run, so stages from separate processes
+    # (digest, agent, site build) can be compared in one file.
+    if not summary or not (summary["totals"]["calls"] or summary["calls_blocked"]):
+        return
+    path = _usage_log_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    row = {"at": datetime.now(timezone.utc).isoformat(), "program": program, **summary}
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(row, ensure_ascii=False) + "\n")
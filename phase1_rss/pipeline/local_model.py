@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import os
+import re
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import repeat
+from pathlib import Path
+from typing import Any
+
+from pipeline.preprocess import clean_text
+
+
+# numpy is imported inside the functions that need it, so heuristic runs
+# without the package (or without a trained model) keep working unchanged.
+HASH_BITS = 16
+HASH_DIM = 1 << HASH_BITS
+_TOKEN = re.compile(r"[a-z0-9]+|[\u3400-\u9fff]")
+_BIGRAM_MIX = 0x9E3779B97F4A7C15
+
+
+def model_path() -> Path:
+    override = os.getenv("LOCAL_MODEL_PATH", "").strip()
+    if override:
+        return Path(override)
+    return Path(__file__).resolve().parents[2] / "outputs" / "local_model.npz"
+
+
+def item_text(item: dict[str, Any]) -> str:
+    body = item.get("prompt_text") or clean_text(str(item.get("article_text") or item.get("content", "")))
+    return f"{item.get('title', '')} {body}".lower()
+
+
+class _SparseRows:
+    # Row-major (row, col, value) triplets; the products below are single
+    # np.bincount passes, so no dense n x HASH_DIM matrix is ever built.
+
+    def __init__(self, rows: Any, cols: Any, vals: Any, n_rows: int) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.vals = vals
+        self.n_rows = n_rows
+
+    def dot(self, w: Any) -> Any:
+        import numpy as np
+
+        return np.bincount(self.rows, weights=self.vals * w[self.cols], minlength=self.n_rows)
+
+    def tdot(self, r: Any) -> Any:
+        import numpy as np
+
+        return np.bincount(self.cols, weights=self.vals * r[self.rows], minlength=HASH_DIM)
+
+
+def _term_counts(items: list[dict[str, Any]]) -> tuple[Any, Any, Any]:
+    import numpy as np
+
+    rows: list[int] = []
+    tokens: list[str] = []
+    for idx, item in enumerate(items):
+        doc = _TOKEN.findall(item_text(item))
+        tokens.extend(doc)
+        rows.extend(repeat(idx, len(doc)))
+    # Each distinct token is hashed once; bigram hashes are mixed from the two
+    # unigram hashes in numpy, and pairs spanning two items are dropped.
+    hashed = {t: zlib.crc32(t.encode("utf-8")) for t in set(tokens)}
+    uni = np.fromiter(map(hashed.__getitem__, tokens), dtype=np.uint64, count=len(tokens))
+    row_arr = np.asarray(rows, dtype=np.int64)
+    same_item = row_arr[1:] == row_arr[:-1]
+    bigram = ((uni[:-1] * np.uint64(_BIGRAM_MIX)) ^ uni[1:]) >> np.uint64(16)
+    cols = np.concatenate([uni, bigram[same_item]]) & np.uint64(HASH_DIM - 1)
+    keys = np.concatenate([row_arr, row_arr[1:][same_item]]) * HASH_DIM + cols.astype(np.int64)
+    unique, counts = np.unique(keys, return_counts=True)
+    return unique // HASH_DIM, unique % HASH_DIM, counts.astype(np.float64)
+
+
+def _tfidf(rows: Any, cols: Any, counts: Any, idf: Any, n_rows: int) -> _SparseRows:
+    import numpy as np
+
+    vals = (1.0 + np.log(counts)) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=vals * vals, minlength=n_rows))
+    vals /= np.maximum(norms[rows], 1e-12)
+    return _SparseRows(rows, cols, vals, n_rows)
+
+
+def _ridge(features: _SparseRows, target: Any, l2: float, iters: int = 200) -> Any:
+    import numpy as np
+
+    # Conjugate gradient on (X'X + n*l2*I) w = X'y. There is no intercept, so
+    # text with no known terms gets a zero adjustment.
+    penalty = l2 * features.n_rows
+    w = np.zeros(HASH_DIM)
+    r = features.tdot(target)
+    p = r.copy()
+    rs = float(r @ r)
+    tolerance = 1e-10 * max(rs, 1e-12)
+    for _ in range(iters):
+        if rs <= tolerance:
+            break
+        ap = features.tdot(features.dot(p)) + penalty * p
+        alpha = rs / float(p @ ap)
+        w += alpha * p
+        r -= alpha * ap
+        rs_next = float(r @ r)
+        p = r + (rs_next / rs) * p
+        rs = rs_next
+    return w
+
+
+def _softmax_regression(
+    features: _SparseRows, labels: Any, n_classes: int, l2: float, iters: int = 300, lr: float = 2.0
+) -> tuple[Any, Any]:
+    import numpy as np
+
+    weights = np.zeros((n_classes, HASH_DIM))
+    bias = np.zeros(n_classes)
+    onehot = np.eye(n_classes)[labels]
+    for _ in range(iters):
+        probs = _softmax(_class_logits(features, weights, bias))
+        grad = (probs - onehot) / features.n_rows
+        for c in range(n_classes):
+            weights[c] -= lr * (features.tdot(grad[:, c]) + l2 * weights[c])
+        bias -= lr * grad.sum(axis=0)
+    return weights, bias
+
+
+def _class_logits(features: _SparseRows, weights: Any, bias: Any) -> Any:
+    import numpy as np
+
+    return np.stack([features.dot(w) for w in weights], axis=1) + bias
+
+
+def _softmax(logits: Any) -> Any:
+    import numpy as np
+
+    z = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return z / z.sum(axis=1, keepdims=True)
+
+
+class LocalModel:
+    # Hashed unigram+bigram TF-IDF features with two linear heads: a ridge
+    # correction to the heuristic relevance score and a softmax category
+    # classifier, both fitted to LLM labels from archived digests.
+
+    def __init__(
+        self,
+        idf: Any,
+        relevance: Any,
+        classes: list[str],
+        category_weights: Any,
+        category_bias: Any,
+        examples: int,
+        trained_at: str,
+    ) -> None:
+        self.idf = idf
+        self.relevance = relevance
+        self.classes = classes
+        self.category_weights = category_weights
+        self.category_bias = category_bias
+        self.examples = examples
+        self.trained_at = trained_at
+
+    def score(self, items: list[dict[str, Any]]) -> list[tuple[float, str, float]]:
+        # (relevance adjustment, category or "", category confidence) per item.
+        if not items:
+            return []
+        features = _tfidf(*_term_counts(items), self.idf, len(items))
+        adjustments = features.dot(self.relevance)
+        if not self.classes:
+            return [(float(a), "", 0.0) for a in adjustments]
+        probs = _softmax(_class_logits(features, self.category_weights, self.category_bias))
+        best = probs.argmax(axis=1)
+        return [
+            (float(a), self.classes[int(b)], float(p[int(b)]))
+            for a, b, p in zip(adjustments, best, probs)
+        ]
+
+    def save(self, path: Path) -> None:
+        import numpy as np
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as fh:
+            np.savez_compressed(
+                fh,
+                idf=self.idf.astype(np.float32),
+                relevance=self.relevance.astype(np.float32),
+                classes=np.asarray(self.classes, dtype=str),
+                category_weights=self.category_weights.astype(np.float32),
+                category_bias=self.category_bias.astype(np.float32),
+                examples=np.asarray(self.examples),
+                trained_at=np.asarray(self.trained_at),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> LocalModel:
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                idf=data["idf"].astype(np.float64),
+                relevance=data["relevance"].astype(np.float64),
+                classes=[str(x) for x in data["classes"]],
+                category_weights=data["category_weights"].astype(np.float64),
+                category_bias=data["category_bias"].astype(np.float64),
+                examples=int(data["examples"]),
+                trained_at=str(data["trained_at"]),
+            )
+
+
+def train_local_model(
+    items: list[dict[str, Any]],
+    residuals: list[float],
+    categories: list[str],
+    l2: float = 0.05,
+    min_category_examples: int = 3,
+) -> LocalModel:
+    import numpy as np
+
+    rows, cols, counts = _term_counts(items)
+    n = len(items)
+    df = np.bincount(cols, minlength=HASH_DIM)
+    idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+    features = _tfidf(rows, cols, counts, idf, n)
+    relevance = _ridge(features, np.asarray(residuals, dtype=np.float64), l2)
+
+    freq = Counter(c for c in categories if c)
+    classes = sorted(c for c, k in freq.items() if k >= min_category_examples)
+    weights = np.zeros((0, HASH_DIM))
+    bias = np.zeros(0)
+    if len(classes) >= 2:
+        keep = [idx for idx, c in enumerate(categories) if c in classes]
+        labels = np.asarray([classes.index(categories[idx]) for idx in keep])
+        subset = _tfidf(*_term_counts([items[idx] for idx in keep]), idf, len(keep))
+        weights, bias = _softmax_regression(subset, labels, len(classes), l2 / 10)
+    else:
+        classes = []
+
+    return LocalModel(
+        idf=idf,
+        relevance=relevance,
+        classes=classes,
+        category_weights=weights,
+        category_bias=bias,
+        examples=n,
+        trained_at=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+@lru_cache(maxsize=1)
+def _load_cached(path: str, mtime: float) -> LocalModel | None:
+    try:
+        model = LocalModel.load(Path(path))
+    except ImportError:
+        print("[WARN] numpy not installed; local model disabled.")
+        return None
+    except (OSError, KeyError, ValueError) as exc:
+        print(f"[WARN] Local model unreadable, ignored: {exc}")
+        return None
+    print(
+        f"[INFO] Local model loaded: examples={model.examples}, "
+        f"categories={len(model.classes)}, trained_at={model.trained_at}"
+    )
+    return model
+
+
+def load_local_model() -> LocalModel | None:
+    if os.getenv("LOCAL_MODEL", "1").strip() == "0":
+        return None
+    path = model_path()
+    if not path.exists():
+        return None
+    return _load_cached(str(path), path.stat().st_mtime)
@@ -1,18 +1,163 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import random
+import re
+import time
 from typing import Any
 
-from pipeline.ingest import canonicalize_url
+from pipeline.canonical import dedupe_key
+from pipeline.preprocess import clean_text
+
+
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_WORDS = 3
+MIN_SHINGLES = 4
+
+# Universal hash family (a*h + b) mod p with independent a, b per permutation.
+# p = 2^31 - 1 keeps a*h + b below 2^63, so numpy can evaluate it in uint64;
+# the fixed seed keeps signatures comparable across runs.
+_PRIME = (1 << 31) - 1
+_rng = random.Random(1303)
+_HASH_A = [_rng.randrange(1, _PRIME) for _ in range(MINHASH_PERMUTATIONS)]
+_HASH_B = [_rng.randrange(0, _PRIME) for _ in range(MINHASH_PERMUTATIONS)]
+# Shingles per vectorized block: bounds the permutations x shingles matrix.
+_MINHASH_BLOCK = 1 << 16
+_TOKEN = re.compile(r"[a-z0-9]+|[\u3400-\u9fff]")
 
 
 def dedupe_items(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
     seen: set[str] = set()
     out: list[dict[str, Any]] = []
     for item in items:
-        key = canonicalize_url(item.get("link", "")) or item.get("title", "").lower()
+        key = dedupe_key(item.get("link", "")) or item.get("title", "").lower()
         if key in seen:
             continue
         seen.add(key)
         out.append(item)
     return out
 
+
+def _dedupe_text(item: dict[str, Any]) -> str:
+    content = str(item.get("content", ""))
+    if item.get("origin_type") == "github":
+        # Drop the Stars/Forks/Language stats block shared by every repo.
+        content = content.split("\n", 1)[0]
+    return f"{item.get('title', '')} {clean_text(content)}".lower()
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> set[int]:
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < k:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = [" ".join(tokens[i : i + k]) for i in range(len(tokens) - k + 1)]
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big")
+        for g in grams
+    }
+
+
+def minhash(shingle_set: set[int]) -> list[int]:
+    hashes = [h % _PRIME for h in shingle_set]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in zip(_HASH_A, _HASH_B)]
+
+
+def minhash_signatures(shingle_sets: list[set[int]]) -> list[list[int]]:
+    # Same values as minhash(), computed for many non-empty sets at once: each
+    # block of sets is one (permutations x shingles) numpy expression, reduced
+    # per set with np.minimum.reduceat.
+    import numpy as np
+
+    a = np.asarray(_HASH_A, dtype=np.uint64)[:, None]
+    b = np.asarray(_HASH_B, dtype=np.uint64)[:, None]
+    signatures: list[list[int]] = []
+    start = 0
+    while start < len(shingle_sets):
+        end = start + 1
+        size = len(shingle_sets[start])
+        while end < len(shingle_sets) and size + len(shingle_sets[end]) <= _MINHASH_BLOCK:
+            size += len(shingle_sets[end])
+            end += 1
+        block = shingle_sets[start:end]
+        flat = np.fromiter((h for s in block for h in s), dtype=np.uint64, count=size)
+        flat %= np.uint64(_PRIME)
+        offsets = np.cumsum([0] + [len(s) for s in block[:-1]])
+        values = (a * flat + b) % np.uint64(_PRIME)
+        signatures.extend(np.minimum.reduceat(values, offsets, axis=1).T.tolist())
+        start = end
+    return signatures
+
+
+def _jaccard(a: set[int], b: set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _find(parent: list[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_near_duplicates(
+    items: list[dict[str, Any]],
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    threshold = min(1.0, max(0.1, float(os.getenv("NEAR_DUP_THRESHOLD", "0.6"))))
+    started = time.monotonic()
+    sets = [shingles(_dedupe_text(x)) for x in items]
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+
+    # LSH: items sharing any band bucket become candidate pairs, so only
+    # likely duplicates get an exact Jaccard check instead of all n^2 pairs.
+    buckets: dict[tuple[int, tuple[int, ...]], list[int]] = {}
+    hashed = [idx for idx, shingle_set in enumerate(sets) if len(shingle_set) >= MIN_SHINGLES]
+    try:
+        signatures = minhash_signatures([sets[idx] for idx in hashed])
+    except ImportError:
+        signatures = [minhash(sets[idx]) for idx in hashed]
+    for idx, signature in zip(hashed, signatures):
+        for band in range(LSH_BANDS):
+            key = (band, tuple(signature[band * rows : (band + 1) * rows]))
+            buckets.setdefault(key, []).append(idx)
+
+    parent = list(range(len(items)))
+    checked: set[tuple[int, int]] = set()
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1 :]:
+                if (i, j) in checked or _find(parent, i) == _find(parent, j):
+                    continue
+                checked.add((i, j))
+                if _jaccard(sets[i], sets[j]) >= threshold:
+                    parent[_find(parent, j)] = _find(parent, i)
+
+    clusters: dict[int, list[int]] = {}
+    for idx in range(len(items)):
+        clusters.setdefault(_find(parent, idx), []).append(idx)
+
+    keep: dict[int, dict[str, Any]] = {}
+    for members in clusters.values():
+        # The fullest write-up represents the cluster; ties keep ingest order.
+        lead = max(members, key=lambda i: (len(sets[i]), -i))
+        item = dict(items[lead])
+        others = [items[i] for i in members if i != lead]
+        if others:
+            item["also_reported_by"] = [
+                {"source": x.get("source", ""), "title": x.get("title", ""), "link": x.get("link", "")}
+                for x in others
+            ]
+        keep[min(members)] = item
+
+    out = [keep[i] for i in sorted(keep)]
+    near_dup_meta = {
+        "near_dup_clusters": sum(1 for m in clusters.values() if len(m) > 1),
+        "near_dup_removed": len(items) - len(out),
+        "near_dup_pairs_checked": len(checked),
+        "near_dup_seconds": round(time.monotonic() - started, 3),
+    }
+    return out, near_dup_meta
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+def extract_openai_text(payload: dict[str, Any], what: str = "OpenAI") -> str:
+    # Text of a Responses API payload: output_text when the SDK-style field is
+    # present, otherwise the first non-empty content block.
+    if isinstance(payload.get("output_text"), str) and payload.get("output_text"):
+        return str(payload["output_text"])
+    for block in payload.get("output", []) or []:
+        for content in block.get("content", []) or []:
+            text = content.get("text")
+            if isinstance(text, str) and text.strip():
+                return text
+    raise ValueError(f"{what} returned empty content.")
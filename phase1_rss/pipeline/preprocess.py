@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import html
+import os
+import re
+from typing import Any
+
+
+BOILERPLATE_PATTERNS = [
+    re.compile(r"The post .{1,300}? appeared first on .{1,200}?(\.|$)", re.IGNORECASE),
+    re.compile(r"(Continue|Keep) reading.{0,120}?(\.|$)", re.IGNORECASE),
+    re.compile(r"\bRead (the )?(full|more)( (article|story|post))?\s*(»|›|→|\.\.\.|…)?", re.IGNORECASE),
+    re.compile(r"Article URL:\s*\S+|Comments URL:\s*\S+|Points:\s*\d+|# Comments:\s*\d+", re.IGNORECASE),
+    re.compile(r"Subscribe (now|to our newsletter).{0,120}?(\.|$)", re.IGNORECASE),
+    re.compile(r"\[(…|\.\.\.|&hellip;)\]"),
+]
+
+_SCRIPT_STYLE = re.compile(r"<(script|style)\b[^>]*>[\s\S]*?</\1\s*>", re.IGNORECASE)
+_BLOCK_BREAK = re.compile(r"<\s*(br|/p|/div|/li|/h\d|/tr)\b[^>]*>", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+# CJK text rarely puts whitespace after a full-width terminator.
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])\s*")
+_CJK_END = ("。", "！", "？")
+_CJK = re.compile(r"[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]")
+# Characters of input the prompt used to send before preprocessing existed.
+RAW_PROMPT_CHARS = 1800
+
+
+def html_to_text(raw: str) -> str:
+    text = _SCRIPT_STYLE.sub(" ", raw or "")
+    text = _BLOCK_BREAK.sub("\n", text)
+    text = _TAG.sub(" ", text)
+    return html.unescape(text).replace("\xa0", " ")
+
+
+def strip_boilerplate(text: str) -> str:
+    for pattern in BOILERPLATE_PATTERNS:
+        text = pattern.sub(" ", text)
+    return text
+
+
+def _join_sentences(sentences: list[str]) -> str:
+    out = ""
+    for sentence in sentences:
+        out += sentence if not out or out.endswith(_CJK_END) else " " + sentence
+    return out
+
+
+def dedupe_sentences(text: str) -> str:
+    seen: set[str] = set()
+    kept: list[str] = []
+    for sentence in _SENTENCE_SPLIT.split(text):
+        key = re.sub(r"\W+", " ", sentence).strip().lower()
+        if not key:
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(sentence.strip())
+    return _join_sentences(kept)
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough BPE estimate: ~4 chars per token for Latin text, ~1 per CJK char.
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    if estimate_tokens(text) <= budget:
+        return text
+    out: list[str] = []
+    used = 0
+    for sentence in _SENTENCE_SPLIT.split(text):
+        if not sentence:
+            continue
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > budget:
+            if not out:
+                return _cut_to_tokens(sentence, budget)
+            break
+        out.append(sentence)
+        used += cost
+    return _join_sentences(out)
+
+
+def _cut_to_tokens(sentence: str, budget: int) -> str:
+    # Single oversized sentence: cut where the running estimate reaches the
+    # budget (a CJK char costs 4x a Latin one), keeping whole Latin words.
+    used = 0.0
+    end = len(sentence)
+    for pos, char in enumerate(sentence):
+        used += 1.0 if _CJK.match(char) else 0.25
+        if used > budget:
+            end = pos
+            break
+    cut = sentence[:end]
+    mid_word = end < len(sentence) and sentence[end].isalnum() and not _CJK.match(sentence[end])
+    if mid_word and " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut
+
+
+def clean_text(raw: str) -> str:
+    text = strip_boilerplate(html_to_text(raw))
+    text = re.sub(r"\s+", " ", text).strip()
+    return dedupe_sentences(text)
+
+
+def preprocess_items(
+    items: list[dict[str, Any]],
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    budget = max(50, int(os.getenv("LLM_ITEM_TOKEN_BUDGET", "450")))
+    out: list[dict[str, Any]] = []
+    before = 0
+    after = 0
+    for item in items:
+        raw = str(item.get("article_text") or item.get("content") or "")
+        text = truncate_to_tokens(clean_text(raw), budget)
+        # Baseline is what the prompt sent before preprocessing: the raw text cut to RAW_PROMPT_CHARS.
+        before += estimate_tokens(raw[:RAW_PROMPT_CHARS])
+        after += estimate_tokens(text)
+        out.append({**item, "prompt_text": text})
+
+    preprocess_meta = {
+        "preprocess_token_budget": budget,
+        "preprocess_tokens_before": before,
+        "preprocess_tokens_after": after,
+        "preprocess_tokens_saved": before - after,
+    }
+    return out, preprocess_meta
@@ -13,6 +13,10 @@ def write_outputs(
     run_meta: dict[str, Any],
 ) -> tuple[Path, Path]:
     output_dir.mkdir(parents=True, exist_ok=True)
+    # Extracted article bodies only feed analysis; keep digests compact.
+    top_items = [
+        {k: v for k, v in x.items() if k not in {"article_text", "prompt_text"}} for x in top_items
+    ]
     ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
     json_path = output_dir / f"digest_{ts}.json"
     md_path = output_dir / f"digest_{ts}.md"
@@ -40,8 +44,14 @@ def write_outputs(
         f"- Analysis Mode: {run_meta.get('analysis_mode')}",
         f"- Model: {run_meta.get('model', '-')}",
         f"- Fallback Used: {run_meta.get('fallback_used', False)}",
-        "",
     ]
+    usage = (run_meta.get("llm_usage") or {}).get("totals")
+    if usage:
+        lines.append(
+            f"- LLM Usage: {usage['calls']} calls, {usage['input_tokens']} in / "
+            f"{usage['output_tokens']} out tokens, ${usage['cost_usd']}, {usage['seconds']}s"
+        )
+    lines.append("")
     for idx, item in enumerate(top_items, start=1):
         lines.extend(
             [
@@ -54,8 +64,13 @@ def write_outputs(
                 f"- Summary: {item.get('summary_cn', '')}",
                 f"- Why It Matters: {item.get('why_it_matters', '')}",
                 f"- Next Action: {item.get('next_action', '')}",
-                "",
             ]
         )
+        also = item.get("also_reported_by") or []
+        if also:
+            lines.append(
+                "- Also Reported By: " + ", ".join(str(x.get("source", "")) for x in also)
+            )
+        lines.append("")
     md_path.write_text("\n".join(lines), encoding="utf-8")
     return md_path, json_path
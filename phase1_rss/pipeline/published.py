@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from pipeline.canonical import dedupe_key
+from pipeline.watermark import ANALYSIS_TIERS, analysis_tier, at_least
+
+
+def _index_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "outputs" / "published_index.json"
+
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _fingerprint(title: str) -> str:
+    tokens = re.findall(r"[a-z0-9]+|[\u3400-\u9fff]", title.lower())
+    return " ".join(tokens)
+
+
+def item_keys(item: dict[str, Any]) -> set[str]:
+    # Hashed id / URL / title-fingerprint keys; any hit means "already published".
+    keys = {f"id:{_digest(str(item.get('id', '')))}"}
+    link = dedupe_key(str(item.get("link", "")))
+    if link:
+        keys.add(f"url:{_digest(link)}")
+    fingerprint = _fingerprint(str(item.get("title", "")))
+    if len(fingerprint.split()) >= 4:
+        keys.add(f"fp:{_digest(fingerprint)}")
+    return keys
+
+
+def load_published_index(now: datetime | None = None) -> dict[str, dict[str, str]]:
+    path = _index_path()
+    if not path.exists():
+        return {}
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+    keys = payload.get("keys", {}) if isinstance(payload, dict) else {}
+    now = now or datetime.now(timezone.utc)
+    horizon = (
+        now - timedelta(days=max(1, int(os.getenv("PUBLISHED_RETENTION_DAYS", "14"))))
+    ).isoformat()
+    index: dict[str, dict[str, str]] = {}
+    for key, value in keys.items():
+        # Version 1 stored only the timestamp; those entries count as LLM-analyzed.
+        entry = {"at": value, "tier": "llm"} if isinstance(value, str) else value
+        # ISO-8601 UTC strings compare in time order, so pruning needs no parsing.
+        if isinstance(entry, dict) and str(entry.get("at", "")) >= horizon:
+            tier = entry.get("tier") if entry.get("tier") in ANALYSIS_TIERS else "llm"
+            index[key] = {"at": str(entry["at"]), "tier": tier}
+    return index
+
+
+def save_published_index(index: dict[str, dict[str, str]]) -> None:
+    path = _index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"version": 2, "keys": dict(sorted(index.items()))}
+    path.write_text(json.dumps(payload, indent=0), encoding="utf-8")
+
+
+def filter_published(
+    items: list[dict[str, Any]], index: dict[str, dict[str, str]], tier: str = "llm"
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    # Only entries published from an analysis at least as strong as this run's
+    # count: a keyword-picked story does not block its later LLM analysis.
+    policy = os.getenv("PUBLISHED_POLICY", "drop").strip().lower()
+    blocking = {key for key, entry in index.items() if at_least(entry["tier"], tier)}
+    out: list[dict[str, Any]] = []
+    hits = 0
+    for item in items:
+        if not (item_keys(item) & blocking):
+            out.append(item)
+            continue
+        hits += 1
+        if policy == "demote":
+            out.append({**item, "previously_published": True})
+
+    published_meta = {
+        "published_policy": policy,
+        "published_index_size": len(index),
+        "published_already": hits,
+    }
+    return out, published_meta
+
+
+def record_published(
+    index: dict[str, dict[str, str]], top_items: list[dict[str, Any]], now: datetime | None = None
+) -> dict[str, dict[str, str]]:
+    stamp = (now or datetime.now(timezone.utc)).isoformat()
+    out = dict(index)
+    for item in top_items:
+        tier = analysis_tier(item)
+        if tier is None:
+            # Fallback analyses (no API key, failed batch) are not recorded.
+            continue
+        keys = set(item_keys(item))
+        for other in item.get("also_reported_by") or []:
+            keys.update(key for key in item_keys(other) if not key.startswith("id:"))
+        for key in keys:
+            # A stronger earlier entry keeps its tier.
+            previous = out[key]["tier"] if key in out else tier
+            out[key] = {"at": stamp, "tier": previous if at_least(previous, tier) else tier}
+    return out
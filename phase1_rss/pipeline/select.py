@@ -41,6 +41,7 @@ def _apply_preference_scores(
     domain_weights = profile.get("domain_weights", {}) or {}
     keyword_weights = profile.get("keyword_weights", {}) or {}
     alpha = float(os.getenv("PREFERENCE_ALPHA", "1.5"))
+    published_penalty = float(os.getenv("PUBLISHED_DEMOTE_PENALTY", "25"))
 
     out: list[dict[str, Any]] = []
     for item in items:
@@ -71,6 +72,9 @@ def _apply_preference_scores(
         preference_score = round(score, 2)
         base = float(item.get("total_score", 0) or 0)
         personalized = round(base + alpha * preference_score, 2)
+        if item.get("previously_published"):
+            personalized = round(personalized - published_penalty, 2)
+            reasons.append(f"previously_published=-{published_penalty:.1f}")
         y = dict(item)
         y["preference_score"] = preference_score
         y["personalized_total_score"] = personalized
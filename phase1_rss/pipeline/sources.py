@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import json
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from config import RSS_SOURCES, TRUSTED_RSS_SOURCES, RssSource
+
+
+REMOVED_FROM_CONFIG = "removed_from_config"
+
+
+def registry_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "outputs" / "source_registry.json"
+
+
+def _parse_iso(value: Any) -> datetime | None:
+    try:
+        return datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _truthy(value: Any) -> bool:
+    return str(value).strip().lower() in {"1", "true", "yes", "trusted"}
+
+
+def parse_catalog(path: Path) -> list[dict[str, Any]]:
+    raw = path.read_text(encoding="utf-8")
+    entries: list[dict[str, Any]] = []
+    if path.suffix.lower() == ".json":
+        payload = json.loads(raw)
+        rows = payload.get("sources", []) if isinstance(payload, dict) else payload
+        for row in rows or []:
+            if not isinstance(row, dict):
+                continue
+            url = str(row.get("url") or row.get("xmlUrl") or "").strip()
+            if url:
+                entries.append(
+                    {
+                        "name": str(row.get("name") or row.get("title") or url).strip(),
+                        "url": url,
+                        "trusted": _truthy(row.get("trusted", False)),
+                    }
+                )
+        return entries
+
+    root = ET.fromstring(raw)
+    for outline in root.iter("outline"):
+        url = (outline.get("xmlUrl") or "").strip()
+        if not url:
+            continue
+        category = (outline.get("category") or "").lower()
+        entries.append(
+            {
+                "name": (outline.get("title") or outline.get("text") or url).strip(),
+                "url": url,
+                "trusted": _truthy(outline.get("trusted", "")) or "trusted" in category,
+            }
+        )
+    return entries
+
+
+def load_registry() -> dict[str, Any]:
+    path = registry_path()
+    payload: dict[str, Any] = {}
+    if path.exists():
+        try:
+            loaded = json.loads(path.read_text(encoding="utf-8"))
+            payload = loaded if isinstance(loaded, dict) else {}
+        except json.JSONDecodeError:
+            payload = {}
+    sources = payload.setdefault("sources", {})
+    # config.RSS_SOURCES stays the built-in seed; catalog imports add to it.
+    configured = {source.url for source in RSS_SOURCES}
+    for source in RSS_SOURCES:
+        entry = sources.setdefault(
+            source.url,
+            {
+                "name": source.name,
+                "url": source.url,
+                "trusted": source.name in TRUSTED_RSS_SOURCES,
+                "enabled": True,
+                "origin": "config",
+            },
+        )
+        entry.setdefault("origin", "config")
+        if entry.get("disabled_reason") == REMOVED_FROM_CONFIG:
+            entry["enabled"] = True
+            entry.pop("disabled_reason", None)
+    # Deleting a feed from config.py retires it, as it did before the registry.
+    for url, entry in sources.items():
+        if isinstance(entry, dict) and entry.get("origin") == "config" and url not in configured:
+            if entry.get("enabled", True):
+                entry["enabled"] = False
+                entry["disabled_reason"] = REMOVED_FROM_CONFIG
+    return payload
+
+
+def save_registry(registry: dict[str, Any]) -> None:
+    path = registry_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(registry, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def import_catalog(registry: dict[str, Any], entries: list[dict[str, Any]]) -> int:
+    sources = registry.setdefault("sources", {})
+    added = 0
+    for entry in entries:
+        current = sources.get(entry["url"])
+        if current is None:
+            sources[entry["url"]] = {**entry, "enabled": True, "origin": "catalog"}
+            added += 1
+        else:
+            current["name"] = entry["name"]
+            current["trusted"] = bool(current.get("trusted")) or entry["trusted"]
+            # The catalog now owns the feed, so leaving config.py no longer retires it.
+            current["origin"] = "catalog"
+            if current.get("disabled_reason") == REMOVED_FROM_CONFIG:
+                current["enabled"] = True
+                current.pop("disabled_reason", None)
+    return added
+
+
+def _matching(registry: dict[str, Any], keys: list[str]) -> list[str]:
+    wanted = {k.strip().lower() for k in keys if k.strip()}
+    return [
+        url
+        for url, entry in registry.get("sources", {}).items()
+        if isinstance(entry, dict)
+        and (url.lower() in wanted or str(entry.get("name", "")).lower() in wanted)
+    ]
+
+
+def set_sources_enabled(registry: dict[str, Any], keys: list[str], enabled: bool) -> list[str]:
+    # keys are feed URLs or names; returns the URLs that matched.
+    urls = _matching(registry, keys)
+    for url in urls:
+        entry = registry["sources"][url]
+        entry["enabled"] = enabled
+        if enabled:
+            entry.pop("disabled_reason", None)
+        else:
+            entry["disabled_reason"] = "manual"
+    return urls
+
+
+def remove_sources(registry: dict[str, Any], keys: list[str]) -> list[dict[str, Any]]:
+    return [registry["sources"].pop(url) for url in _matching(registry, keys)]
+
+
+def trusted_source_names() -> set[str]:
+    registry = load_registry()
+    names = {
+        str(x.get("name", ""))
+        for x in registry.get("sources", {}).values()
+        if isinstance(x, dict) and x.get("trusted")
+    }
+    return names | set(TRUSTED_RSS_SOURCES)
+
+
+def active_sources(
+    registry: dict[str, Any], now: datetime | None = None, include_unhealthy: bool = False
+) -> tuple[list[RssSource], int]:
+    now = now or datetime.now(timezone.utc)
+    active: list[RssSource] = []
+    skipped = 0
+    for entry in registry.get("sources", {}).values():
+        if not isinstance(entry, dict) or not entry.get("enabled", True):
+            continue
+        next_check = _parse_iso((entry.get("health") or {}).get("next_check_at"))
+        if next_check and next_check > now and not include_unhealthy:
+            skipped += 1
+            continue
+        active.append(RssSource(str(entry.get("name", "")), str(entry.get("url", ""))))
+    return active, skipped
+
+
+def _classify(health: dict[str, Any], now: datetime) -> tuple[str, datetime | None]:
+    fails_to_demote = max(1, int(os.getenv("SOURCE_FAILS_TO_DEMOTE", "3")))
+    fails_to_dead = max(fails_to_demote, int(os.getenv("SOURCE_FAILS_TO_DEAD", "14")))
+    stale_days = max(1, int(os.getenv("SOURCE_STALE_DAYS", "30")))
+    slow_seconds = max(1.0, float(os.getenv("SOURCE_SLOW_SECONDS", "10")))
+
+    failures = int(health.get("consecutive_failures", 0))
+    if failures >= fails_to_dead:
+        return "dead", now + timedelta(days=7)
+    if failures >= fails_to_demote:
+        backoff_hours = min(24 * 7, 6 * 2 ** (failures - fails_to_demote))
+        return "demoted", now + timedelta(hours=backoff_hours)
+    if float(health.get("latency_ewma", 0.0)) > slow_seconds:
+        return "slow", now + timedelta(hours=12)
+    last_new = _parse_iso(health.get("last_new_entry_at"))
+    if last_new and last_new < now - timedelta(days=stale_days):
+        return "stale", now + timedelta(days=1)
+    return "active", None
+
+
+def record_fetch(
+    registry: dict[str, Any],
+    source: RssSource,
+    ok: bool,
+    latency: float | None = None,
+    entries: int = 0,
+    newest_entry_at: datetime | None = None,
+    now: datetime | None = None,
+    outage: bool = False,
+) -> None:
+    now = now or datetime.now(timezone.utc)
+    entry = registry.setdefault("sources", {}).setdefault(
+        source.url, {"name": source.name, "url": source.url, "trusted": False, "enabled": True}
+    )
+    health = entry.setdefault("health", {})
+    health["attempts"] = int(health.get("attempts", 0)) + 1
+    if outage:
+        # Every source failed in the same run: most likely our own network, so
+        # the failure is noted but the source's health is left as it was.
+        health["outage_failures"] = int(health.get("outage_failures", 0)) + 1
+        health["last_failure_at"] = now.isoformat()
+        return
+    health["error_rate"] = round(
+        0.8 * float(health.get("error_rate", 0.0)) + 0.2 * (0.0 if ok else 1.0), 4
+    )
+    if ok:
+        health["consecutive_failures"] = 0
+        health["last_success_at"] = now.isoformat()
+        health["entries_yielded"] = int(health.get("entries_yielded", 0)) + entries
+        if latency is not None:
+            previous = health.get("latency_ewma")
+            health["latency_ewma"] = round(
+                latency if previous is None else 0.7 * float(previous) + 0.3 * latency, 3
+            )
+        newest_known = _parse_iso(health.get("newest_entry_at"))
+        if newest_entry_at and (newest_known is None or newest_entry_at > newest_known):
+            health["newest_entry_at"] = newest_entry_at.isoformat()
+            health["last_new_entry_at"] = min(newest_entry_at, now).isoformat()
+        health.setdefault("last_new_entry_at", now.isoformat())
+    else:
+        health["failures"] = int(health.get("failures", 0)) + 1
+        health["consecutive_failures"] = int(health.get("consecutive_failures", 0)) + 1
+        health["last_failure_at"] = now.isoformat()
+
+    status, next_check = _classify(health, now)
+    health["status"] = status
+    health["next_check_at"] = next_check.isoformat() if next_check else None
+
+
+def _yield_weight(entry: dict[str, Any]) -> float | None:
+    stats = entry.get("yield") or {}
+    if int(stats.get("runs", 0)) < max(1, int(os.getenv("ADAPTIVE_MIN_RUNS", "3"))):
+        return None
+    return float(stats.get("relevant_rate", 0.0)) + float(stats.get("selected_rate", 0.0))
+
+
+def adaptive_depths(registry: dict[str, Any], base_depth: int) -> dict[str, int]:
+    low = max(1, int(os.getenv("ADAPTIVE_DEPTH_MIN", "2")))
+    high = max(low, int(os.getenv("ADAPTIVE_DEPTH_MAX", str(base_depth * 2))))
+    entries = [x for x in registry.get("sources", {}).values() if isinstance(x, dict)]
+    weights = {str(x.get("url", "")): _yield_weight(x) for x in entries}
+    known = [w for w in weights.values() if w is not None]
+    mean = sum(known) / len(known) if known else 0.0
+
+    # Depth is allocated relative to the average yield so the total fetch
+    # budget stays close to base_depth * sources while shifting toward
+    # feeds whose items actually get marked relevant and selected.
+    depths: dict[str, int] = {}
+    for url, weight in weights.items():
+        if weight is None or mean <= 0:
+            depths[url] = base_depth
+        else:
+            depths[url] = max(low, min(high, round(base_depth * weight / mean)))
+    return depths
+
+
+def record_source_yield(
+    analyzed: list[dict[str, Any]], selected: list[dict[str, Any]]
+) -> None:
+    registry = load_registry()
+    url_by_name = {
+        str(x.get("name", "")): url
+        for url, x in registry.get("sources", {}).items()
+        if isinstance(x, dict)
+    }
+    selected_ids = {str(x.get("id", "")) for x in selected}
+    counts: dict[str, list[int]] = {}
+    for item in analyzed:
+        if item.get("origin_type") != "rss":
+            continue
+        row = counts.setdefault(str(item.get("source", "")), [0, 0, 0])
+        row[0] += 1
+        row[1] += 1 if item.get("is_relevant") else 0
+        row[2] += 1 if str(item.get("id", "")) in selected_ids else 0
+
+    for name, (ingested, relevant, chosen) in counts.items():
+        url = url_by_name.get(name)
+        if not url or not ingested:
+            continue
+        stats = registry["sources"][url].setdefault("yield", {})
+        runs = int(stats.get("runs", 0))
+        for key, value in (
+            ("ingested_ewma", float(ingested)),
+            ("relevant_rate", relevant / ingested),
+            ("selected_rate", chosen / ingested),
+        ):
+            previous = float(stats.get(key, value))
+            stats[key] = round(value if runs == 0 else 0.7 * previous + 0.3 * value, 4)
+        stats["runs"] = runs + 1
+        stats["last_ingested"] = ingested
+        stats["last_relevant"] = relevant
+        stats["last_selected"] = chosen
+    save_registry(registry)
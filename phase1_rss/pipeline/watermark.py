@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from pipeline.canonical import dedupe_key
+from pipeline.ingest import parse_timestamp
+
+
+def _watermark_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "outputs" / "ingest_watermarks.json"
+
+
+def _retention() -> timedelta:
+    return timedelta(days=max(1, int(os.getenv("WATERMARK_RETENTION_DAYS", "30"))))
+
+
+def load_watermarks() -> dict[str, dict[str, Any]]:
+    path = _watermark_path()
+    if not path.exists():
+        return {}
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def save_watermarks(marks: dict[str, dict[str, Any]]) -> None:
+    path = _watermark_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(marks, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+# Analysis strength an item was settled at, weakest first. A run skips items
+# settled at its own tier or a stronger one, so keyword-only scoring never
+# keeps an item from reaching a later LLM run. Plain "seen" and
+# "last_published_at" belong to the llm tier.
+ANALYSIS_TIERS = ("heuristic", "llm")
+_TIER_BY_SOURCE = {
+    "llm": "llm",
+    "llm_cache": "llm",
+    "heuristic": "heuristic",
+    "heuristic_gated": "heuristic",
+}
+
+
+def analysis_tier(item: dict[str, Any]) -> str | None:
+    # None for fallback results, which settle nothing.
+    return _TIER_BY_SOURCE.get(str(item.get("analysis_source", "")))
+
+
+def run_tier(analysis_mode: str) -> str | None:
+    if analysis_mode.startswith("llm"):
+        return "llm"
+    return "heuristic" if analysis_mode == "heuristic" else None
+
+
+def at_least(tier: str, minimum: str) -> bool:
+    return ANALYSIS_TIERS.index(tier) >= ANALYSIS_TIERS.index(minimum)
+
+
+def _fields(tier: str) -> tuple[str, str]:
+    if tier == "llm":
+        return "seen", "last_published_at"
+    return f"seen_{tier}", f"last_published_at_{tier}"
+
+
+def _is_new(item: dict[str, Any], mark: dict[str, Any], tier: str) -> bool:
+    for settled_tier in ANALYSIS_TIERS[ANALYSIS_TIERS.index(tier) :]:
+        seen_field, published_field = _fields(settled_tier)
+        if str(item.get("id", "")) in (mark.get(seen_field, {}) or {}):
+            return False
+        if item.get("origin_type") != "rss":
+            continue
+        # Seen ids are pruned after the retention window, so RSS entries older
+        # than that horizon must be rejected by timestamp instead.
+        published = parse_timestamp(item.get("published_at"))
+        watermark = parse_timestamp(mark.get(published_field))
+        if published and watermark and published < watermark - _retention():
+            return False
+    return True
+
+
+def filter_new_items(
+    items: list[dict[str, Any]], marks: dict[str, dict[str, Any]], tier: str = "llm"
+) -> tuple[list[dict[str, Any]], int]:
+    fresh: list[dict[str, Any]] = []
+    skipped = 0
+    for item in items:
+        mark = marks.get(str(item.get("source", "")), {})
+        if _is_new(item, mark, tier):
+            fresh.append(item)
+        else:
+            skipped += 1
+    return fresh, skipped
+
+
+def settled_items(
+    ingested: list[dict[str, Any]], analyzed: list[dict[str, Any]], default_tier: str | None
+) -> dict[str, list[dict[str, Any]]]:
+    # Groups ingested items by the tier their analysis settles them at.
+    # Fallback results (heuristic_fallback, llm_missing) settle nothing, so the
+    # next run analyzes them again; duplicates merged into an item follow it,
+    # and items dropped before analysis (already published) take default_tier,
+    # the tier of the run as a whole (None when the run itself fell back).
+    by_id: dict[str, str | None] = {}
+    by_link: dict[str, str | None] = {}
+    for item in analyzed:
+        tier = analysis_tier(item)
+        by_id[str(item.get("id", ""))] = tier
+        for x in [item, *(item.get("also_reported_by") or [])]:
+            link = dedupe_key(str(x.get("link", "")))
+            if link:
+                by_link[link] = tier
+    groups: dict[str, list[dict[str, Any]]] = {tier: [] for tier in ANALYSIS_TIERS}
+    for item in ingested:
+        item_id = str(item.get("id", ""))
+        link = dedupe_key(str(item.get("link", "")))
+        if item_id in by_id:
+            tier = by_id[item_id]
+        elif link in by_link:
+            tier = by_link[link]
+        else:
+            tier = default_tier
+        if tier is not None:
+            groups[tier].append(item)
+    return groups
+
+
+def advance_watermarks(
+    marks: dict[str, dict[str, Any]], items: list[dict[str, Any]], tier: str = "llm"
+) -> dict[str, dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    horizon = now - _retention()
+    seen_field, published_field = _fields(tier)
+    out: dict[str, dict[str, Any]] = {}
+    for source, mark in marks.items():
+        out[source] = {**mark, seen_field: dict(mark.get(seen_field, {}) or {})}
+
+    for item in items:
+        source = str(item.get("source", ""))
+        mark = out.setdefault(source, {seen_field: {}})
+        mark.setdefault(seen_field, {})
+        mark[seen_field].setdefault(str(item.get("id", "")), now.isoformat())
+        published = parse_timestamp(item.get("published_at"))
+        current = parse_timestamp(mark.get(published_field))
+        if published and (current is None or published > current):
+            mark[published_field] = published.isoformat()
+            if tier == "llm":
+                mark["last_id"] = str(item.get("id", ""))
+                mark["last_link"] = str(item.get("link", ""))
+        mark["updated_at"] = now.isoformat()
+
+    for mark in out.values():
+        if seen_field in mark:
+            mark[seen_field] = {
+                key: first_seen
+                for key, first_seen in mark[seen_field].items()
+                if (parse_timestamp(first_seen) or now) >= horizon
+            }
+    return out
@@ -3,6 +3,8 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import sys
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -12,6 +14,9 @@ from dotenv import load_dotenv
 
 from tools import check_github_quality
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "phase1_rss"))
+from pipeline.llm_usage import LlmBudgetExceeded, append_usage_log, llm_usage  # noqa: E402
+
 
 def find_latest_digest_json(outputs_dir: Path) -> Path:
     files = sorted(outputs_dir.glob("digest_*.json"), key=lambda p: p.stat().st_mtime)
@@ -68,10 +73,19 @@ def run_github_due_diligence(
 
         q["from_item_title"] = item.get("title", "")
         q["from_source"] = item.get("source", "")
-        q["priority"] = _priority_by_score(_safe_float(q.get("quality_score", 0)))
+        if q.get("deferred"):
+            q["priority"] = "deferred"
+        else:
+            q["priority"] = _priority_by_score(_safe_float(q.get("quality_score", 0)))
         reports.append(q)
 
-    reports.sort(key=lambda x: _safe_float(x.get("quality_score", 0)), reverse=True)
+    deferred = len([x for x in reports if x.get("deferred")])
+    if deferred:
+        print(f"[WARN] GitHub due diligence deferred by rate limit: {deferred} repos")
+    reports.sort(
+        key=lambda x: (not x.get("deferred"), _safe_float(x.get("quality_score", 0))),
+        reverse=True,
+    )
     return reports
 
 def run_non_github_analysis(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
@@ -120,7 +134,7 @@ def _llm_summary_openai(
     payload: dict[str, Any],
     api_key: str,
     model: str = "gpt-5-codex",
-) -> str:
+) -> tuple[str, dict[str, int]]:
     from openai import OpenAI
 
     client = OpenAI(api_key=api_key)
@@ -134,14 +148,18 @@ def _llm_summary_openai(
         + json.dumps(payload, ensure_ascii=False)
     )
     resp = client.responses.create(model=model, input=prompt)
-    return (getattr(resp, "output_text", "") or "").strip()
+    usage = getattr(resp, "usage", None)
+    return (getattr(resp, "output_text", "") or "").strip(), {
+        "input_tokens": int(getattr(usage, "input_tokens", 0) or 0),
+        "output_tokens": int(getattr(usage, "output_tokens", 0) or 0),
+    }
 
 
 def _llm_summary_gemini(
     payload: dict[str, Any],
     api_key: str,
     model: str = "gemini-2.0-flash",
-) -> str:
+) -> tuple[str, dict[str, int]]:
     prompt = (
         "你是AI产品团队的研究负责人。根据输入JSON给出中文执行摘要，要求：\n"
         "1) 今日必须跟进(P0)事项，最多3条；\n"
@@ -161,33 +179,49 @@ def _llm_summary_gemini(
     )
     resp.raise_for_status()
     data = resp.json()
-    return (
+    usage = data.get("usageMetadata") or {}
+    text = (
         ((data.get("candidates") or [{}])[0].get("content") or {})
         .get("parts", [{}])[0]
         .get("text", "")
         .strip()
     )
+    return text, {
+        "input_tokens": int(usage.get("promptTokenCount", 0) or 0),
+        "output_tokens": int(usage.get("candidatesTokenCount", 0) or 0),
+    }
 
 
 def synthesize_summary(payload: dict[str, Any], use_llm: bool) -> tuple[str, str, str]:
     if not use_llm:
         return "", "none", "-"
 
+    usage = llm_usage()
     if os.getenv("OPENAI_API_KEY"):
         model = os.getenv("OPENAI_MODEL", "gpt-5-codex")
+        started = time.monotonic()
         try:
-            text = _llm_summary_openai(payload, api_key=os.environ["OPENAI_API_KEY"], model=model)
+            usage.check("agent_summary")
+            text, tokens = _llm_summary_openai(payload, api_key=os.environ["OPENAI_API_KEY"], model=model)
+            usage.record("agent_summary", "openai", model, seconds=time.monotonic() - started, **tokens)
             return text, "openai", model
         except Exception as exc:
+            if not isinstance(exc, LlmBudgetExceeded):
+                usage.record("agent_summary", "openai", model, 0, 0, time.monotonic() - started, ok=False)
             print(f"[WARN] Agent OpenAI summary failed: {exc}")
             return "", "openai_fallback", model
 
     if os.getenv("GEMINI_API_KEY"):
         model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+        started = time.monotonic()
         try:
-            text = _llm_summary_gemini(payload, api_key=os.environ["GEMINI_API_KEY"], model=model)
+            usage.check("agent_summary")
+            text, tokens = _llm_summary_gemini(payload, api_key=os.environ["GEMINI_API_KEY"], model=model)
+            usage.record("agent_summary", "gemini", model, seconds=time.monotonic() - started, **tokens)
             return text, "gemini", model
         except Exception as exc:
+            if not isinstance(exc, LlmBudgetExceeded):
+                usage.record("agent_summary", "gemini", model, 0, 0, time.monotonic() - started, ok=False)
             msg = str(exc)
             msg = msg.replace(os.getenv("GEMINI_API_KEY", ""), "***")
             print(f"[WARN] Agent Gemini summary failed: {msg}")
@@ -205,6 +239,7 @@ def write_report(
     llm_summary: str,
     llm_provider: str,
     llm_model: str,
+    llm_usage_summary: dict[str, Any] | None = None,
 ) -> tuple[Path, Path]:
     ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
     json_out = outputs_dir / f"agent_report_{ts}.json"
@@ -216,7 +251,9 @@ def write_report(
         "digest_meta": digest_meta,
         "llm_provider": llm_provider,
         "llm_model": llm_model,
+        "llm_usage": llm_usage_summary,
         "github_report_count": len(github_reports),
+        "github_deferred_count": len([x for x in github_reports if x.get("deferred")]),
         "article_report_count": len(article_reports),
         "github_reports": github_reports,
         "article_reports": article_reports,
@@ -224,6 +261,7 @@ def write_report(
     }
     json_out.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
 
+    usage_totals = (llm_usage_summary or {}).get("totals") or {}
     lines = [
         "# Agent Intelligence Report",
         "",
@@ -233,7 +271,10 @@ def write_report(
         f"- Digest model: {digest_meta.get('model', '-')}",
         f"- Agent LLM provider: {llm_provider}",
         f"- Agent LLM model: {llm_model}",
+        f"- Agent LLM tokens: {usage_totals.get('input_tokens', 0)} in / "
+        f"{usage_totals.get('output_tokens', 0)} out, {usage_totals.get('seconds', 0)}s",
         f"- GitHub repos analyzed: {len(github_reports)}",
+        f"- GitHub repos deferred (rate limit): {payload['github_deferred_count']}",
         f"- Non-GitHub articles analyzed: {len(article_reports)}",
         "",
     ]
@@ -243,7 +284,7 @@ def write_report(
 
     lines.extend(["## P0 / P1 Action Queue", ""])
     queue = sorted(
-        github_reports + article_reports,
+        [x for x in github_reports if not x.get("deferred")] + article_reports,
         key=lambda x: (x.get("priority", "P9"), -(x.get("quality_score", x.get("insight_score", 0)))),
     )
     for idx, r in enumerate(queue[:10], start=1):
@@ -333,7 +374,9 @@ def main() -> None:
         llm_summary=llm_summary,
         llm_provider=llm_provider,
         llm_model=llm_model,
+        llm_usage_summary=llm_usage().summary(),
     )
+    append_usage_log("phase2_agent", llm_usage().summary())
     print(f"[OK] Agent report markdown: {md_out}")
     print(f"[OK] Agent report json:     {json_out}")
 
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
 import math
+import sys
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Any
 from urllib.parse import urlparse
 
 import requests
 
+PHASE1_DIR = Path(__file__).resolve().parents[2] / "phase1_rss"
+if str(PHASE1_DIR) not in sys.path:
+    sys.path.insert(0, str(PHASE1_DIR))
+
+from pipeline.github_rate import GitHubBudgetExhausted, get_governor  # noqa: E402
+
 
 @dataclass
 class RepoIdentity:
@@ -39,6 +47,17 @@ def _days_since(iso_str: str | None) -> int:
         return 365
 
 
+def _deferred_result(repo_url: str, reason: str) -> dict[str, Any]:
+    return {
+        "repo_url": repo_url,
+        "ok": False,
+        "deferred": True,
+        "error": reason,
+        "quality_score": 0,
+        "recommendation": "deferred",
+    }
+
+
 def check_github_quality(repo_url: str, github_token: str | None = None) -> dict[str, Any]:
     ident = parse_repo_url(repo_url)
     if not ident:
@@ -53,8 +72,17 @@ def check_github_quality(repo_url: str, github_token: str | None = None) -> dict
     if github_token:
         headers["Authorization"] = f"Bearer {github_token}"
 
+    governor = get_governor()
+    try:
+        governor.acquire("core")
+    except GitHubBudgetExhausted as exc:
+        return _deferred_result(repo_url, str(exc))
+
     repo_api = f"https://api.github.com/repos/{ident.owner}/{ident.repo}"
     resp = requests.get(repo_api, headers=headers, timeout=30)
+    governor.update("core", resp)
+    if resp.status_code in {403, 429} and governor.is_exhausted("core"):
+        return _deferred_result(repo_url, f"GitHub rate limited: {resp.status_code}")
     if resp.status_code >= 400:
         return {
             "repo_url": repo_url,
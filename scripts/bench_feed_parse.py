@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import feedparser
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "phase1_rss"))
+
+from pipeline.feedparse import parse_entries  # noqa: E402
+
+
+def synthetic_feed(entries: int, summary_chars: int) -> bytes:
+    now = datetime.now(timezone.utc)
+    body = "Agentic inference benchmark with quantization and tool-calling. " * (
+        summary_chars // 64 + 1
+    )
+    items = []
+    for idx in range(entries):
+        items.append(
+            "<item>"
+            f"<title>Paper {idx}: scaling agents</title>"
+            f"<link>https://paperswithcode.com/paper/paper-{idx}</link>"
+            f"<description>&lt;p&gt;{body[:summary_chars]}&lt;/p&gt;</description>"
+            f"<pubDate>{format_datetime(now - timedelta(minutes=idx))}</pubDate>"
+            f"<guid>paper-{idx}</guid>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0"><channel><title>Synthetic</title>'
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def _chunks(body: bytes, size: int = 64 * 1024) -> list[bytes]:
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> tuple[float, float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / (1024 * 1024), len(result)
+
+
+def bench(name: str, body: bytes, max_entries: int, repeat: int) -> None:
+    chunks = _chunks(body)
+    cases = {
+        "feedparser": lambda: list(feedparser.parse(body).entries)[:max_entries],
+        "stream": lambda: parse_entries(iter(chunks), max_entries)[0],
+    }
+    print(f"\n{name}: {len(body) / (1024 * 1024):.2f} MiB, max_entries={max_entries}")
+    print(f"{'parser':<12}{'best ms':>12}{'peak MiB':>12}{'entries':>10}")
+    for label, fn in cases.items():
+        ms, peak, count = _measure(fn, repeat)
+        print(f"{label:<12}{ms:>12.1f}{peak:>12.2f}{count:>10}")
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark streaming feed parser vs feedparser.")
+    p.add_argument("--feed", action="append", type=Path, default=[], help="Recorded feed file.")
+    p.add_argument("--max-entries", type=int, default=8)
+    p.add_argument("--synthetic-entries", type=int, default=2000)
+    p.add_argument("--summary-chars", type=int, default=2000)
+    p.add_argument("--repeat", type=int, default=3)
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    feeds = [(str(path), path.read_bytes()) for path in args.feed]
+    if not feeds:
+        feeds = [
+            (
+                f"synthetic rss ({args.synthetic_entries} entries)",
+                synthetic_feed(args.synthetic_entries, args.summary_chars),
+            )
+        ]
+    for name, body in feeds:
+        bench(name, body, args.max_entries, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
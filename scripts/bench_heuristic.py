@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "phase1_rss"))
+
+from config import NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS  # noqa: E402
+from pipeline.analyze import heuristic_analyze  # noqa: E402
+from pipeline.keywords import KeywordMatcher  # noqa: E402
+
+FILLER = (
+    "the a of and to in for with on new we our this that is are be from by as at "
+    "scaling training dataset vector team week update users latency memory gpu cluster"
+).split()
+
+
+def synthetic_items(count: int, words: int, seed: int = 7) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    vocab = FILLER * 6 + sorted(POSITIVE_KEYWORDS) + sorted(NEGATIVE_KEYWORDS)
+    return [
+        {
+            "id": f"bench::{idx}",
+            "source": "Bench",
+            "title": " ".join(rng.choice(vocab) for _ in range(8)).title(),
+            "link": f"https://example.com/{idx}",
+            "content": " ".join(rng.choice(vocab) for _ in range(words)),
+            "origin_type": "rss" if idx % 4 else "github",
+        }
+        for idx in range(count)
+    ]
+
+
+def _texts(items: list[dict[str, Any]]) -> list[str]:
+    return [f"{x['title']} {x['content']}".lower() for x in items]
+
+
+def _timed(fn: Any, repeat: int) -> tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _keyword_scan(texts: list[str], keywords: set[str], repeat: int) -> list[tuple[str, float]]:
+    auto = KeywordMatcher(keywords)
+    trie = KeywordMatcher(keywords, trie_min=1)
+
+    def substring_scan() -> list[int]:
+        return [sum(1 for k in keywords if k in t) for t in texts]
+
+    base, expected = _timed(substring_scan, repeat)
+    rows = [(f"k in text ({len(keywords)} kw)", base)]
+    for label, matcher in (("matcher auto", auto), ("matcher trie", trie)):
+        seconds, got = _timed(lambda: [matcher.count(t) for t in texts], repeat)
+        assert got == expected, f"{label} disagrees with substring scan"
+        rows.append((f"{label} ({len(keywords)} kw)", seconds))
+    return rows
+
+
+def bench(count: int, words: int, extra_keywords: int, repeat: int) -> None:
+    items = synthetic_items(count, words)
+    texts = _texts(items)
+    rng = random.Random(11)
+    extra = {
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 10)))
+        for _ in range(extra_keywords)
+    }
+    rows = _keyword_scan(texts, set(POSITIVE_KEYWORDS), repeat)
+    rows += _keyword_scan(texts, set(POSITIVE_KEYWORDS) | extra, repeat)
+
+    os.environ["HEURISTIC_WORKERS"] = "1"
+    serial, serial_out = _timed(lambda: heuristic_analyze(items), repeat)
+    rows.append(("heuristic_analyze serial", serial))
+    workers = os.cpu_count() or 1
+    if workers > 1:
+        os.environ["HEURISTIC_WORKERS"] = str(workers)
+        os.environ["HEURISTIC_PARALLEL_MIN_ITEMS"] = "1"
+        parallel, parallel_out = _timed(lambda: heuristic_analyze(items), repeat)
+        assert [x["total_score"] for x in serial_out] == [x["total_score"] for x in parallel_out]
+        rows.append((f"heuristic_analyze {workers} procs", parallel))
+
+    print(f"\n{count} items x ~{words} words, cpus={workers}")
+    print(f"{'case':<34}{'best s':>10}{'items/s':>12}")
+    for label, seconds in rows:
+        print(f"{label:<34}{seconds:>10.3f}{count / seconds:>12.0f}")
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark heuristic keyword scoring.")
+    p.add_argument("--items", type=int, action="append", default=[])
+    p.add_argument("--words", type=int, default=250)
+    p.add_argument("--extra-keywords", type=int, default=500)
+    p.add_argument("--repeat", type=int, default=3)
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    for count in args.items or [10_000, 100_000]:
+        bench(count, args.words, args.extra_keywords, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import os
 import re
 import shutil
 import subprocess
+import sys
 import time
 from datetime import datetime, timezone
 from pathlib import Path
@@ -18,6 +19,11 @@ from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "phase1_rss"))
+
+from pipeline.llm_usage import LlmBudgetExceeded, append_usage_log, llm_usage  # noqa: E402
+from pipeline.openai_text import extract_openai_text  # noqa: E402
+
 OUTPUTS_DIR = ROOT / "outputs"
 TEMPLATES_DIR = ROOT / "scripts" / "templates"
 SITE_DIR = ROOT / "site"
@@ -287,19 +293,6 @@ def _extract_json_object(raw: str) -> dict[str, Any]:
     return parsed
 
 
-def _extract_openai_text(payload: dict[str, Any]) -> str:
-    if isinstance(payload.get("output_text"), str) and payload.get("output_text"):
-        return str(payload["output_text"])
-    out = payload.get("output", []) or []
-    for block in out:
-        for content in block.get("content", []) or []:
-            text = content.get("text")
-            if isinstance(text, str) and text.strip():
-                return text
-    raise ValueError("OpenAI translation returned empty content.")
-
-
-
 def _sanitize_error_message(message: str) -> str:
     return re.sub(r"(key=)[^&\s]+", r"\1***", message, flags=re.IGNORECASE)
 def _translation_prompt(fields: dict[str, str]) -> str:
@@ -311,7 +304,9 @@ def _translation_prompt(fields: dict[str, str]) -> str:
     )
 
 
-def _translate_with_openai(fields: dict[str, str], api_key: str, model: str) -> dict[str, str]:
+def _translate_with_openai(
+    fields: dict[str, str], api_key: str, model: str
+) -> tuple[dict[str, str], dict[str, int]]:
     resp = requests.post(
         "https://api.openai.com/v1/responses",
         headers={
@@ -325,17 +320,23 @@ def _translate_with_openai(fields: dict[str, str], api_key: str, model: str) ->
         timeout=60,
     )
     resp.raise_for_status()
-    text = _extract_openai_text(resp.json())
-    parsed = _extract_json_object(text)
+    data = resp.json()
+    parsed = _extract_json_object(extract_openai_text(data, "OpenAI translation"))
+    usage = data.get("usage") or {}
     return {
         "title_en": str(parsed.get("title_en", "")).strip(),
         "summary_en": str(parsed.get("summary_en", "")).strip(),
         "why_it_matters_en": str(parsed.get("why_it_matters_en", "")).strip(),
         "next_action_en": str(parsed.get("next_action_en", "")).strip(),
+    }, {
+        "input_tokens": int(usage.get("input_tokens", 0) or 0),
+        "output_tokens": int(usage.get("output_tokens", 0) or 0),
     }
 
 
-def _translate_with_gemini(fields: dict[str, str], api_key: str, model: str) -> dict[str, str]:
+def _translate_with_gemini(
+    fields: dict[str, str], api_key: str, model: str
+) -> tuple[dict[str, str], dict[str, int]]:
     resp = requests.post(
         f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent",
         params={"key": api_key},
@@ -354,11 +355,15 @@ def _translate_with_gemini(fields: dict[str, str], api_key: str, model: str) ->
         .get("text", "")
     )
     parsed = _extract_json_object(text)
+    usage = data.get("usageMetadata") or {}
     return {
         "title_en": str(parsed.get("title_en", "")).strip(),
         "summary_en": str(parsed.get("summary_en", "")).strip(),
         "why_it_matters_en": str(parsed.get("why_it_matters_en", "")).strip(),
         "next_action_en": str(parsed.get("next_action_en", "")).strip(),
+    }, {
+        "input_tokens": int(usage.get("promptTokenCount", 0) or 0),
+        "output_tokens": int(usage.get("candidatesTokenCount", 0) or 0),
     }
 
 
@@ -377,16 +382,25 @@ def _translate_fields_with_fallback(fields: dict[str, str]) -> tuple[dict[str, s
     if gemini_key:
         attempts.append(("gemini", gemini_key, gemini_model))
 
+    usage = llm_usage()
     last_error = ""
     for provider, key, model in attempts:
         for retry in range(2):
+            try:
+                usage.check("translate")
+            except LlmBudgetExceeded as exc:
+                print(f"[WARN] Translation skipped: {exc}")
+                return {}, "none", "-", "fallback_budget"
+            started = time.monotonic()
             try:
                 if provider == "openai":
-                    translated = _translate_with_openai(fields, api_key=key, model=model)
+                    translated, tokens = _translate_with_openai(fields, api_key=key, model=model)
                 else:
-                    translated = _translate_with_gemini(fields, api_key=key, model=model)
+                    translated, tokens = _translate_with_gemini(fields, api_key=key, model=model)
+                usage.record("translate", provider, model, seconds=time.monotonic() - started, **tokens)
                 return translated, provider, model, "translated"
             except Exception as exc:
+                usage.record("translate", provider, model, 0, 0, time.monotonic() - started, ok=False)
                 last_error = str(exc)
                 if retry == 0:
                     time.sleep(1)
@@ -615,11 +629,13 @@ def build_site(top_k: int, output_dir: Path) -> Path:
         "top_k": top_k,
         "selected_items": len(selected_items),
         "en_items": len(en_items),
+        "llm_usage": llm_usage().summary(),
     }
     (output_dir / "build_info.txt").write_text(
         json.dumps(build_info, ensure_ascii=False, indent=2),
         encoding="utf-8",
     )
+    append_usage_log("site_build", build_info["llm_usage"])
 
     assets_src = TEMPLATES_DIR / "assets"
     shutil.copytree(assets_src, output_dir / "assets", dirs_exist_ok=True)
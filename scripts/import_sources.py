@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "phase1_rss"))
+
+from pipeline.sources import (  # noqa: E402
+    import_catalog,
+    load_registry,
+    parse_catalog,
+    remove_sources,
+    save_registry,
+    set_sources_enabled,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Import RSS sources from an OPML/JSON catalog.")
+    p.add_argument("--input", type=Path, help="Catalog file (.opml/.xml or .json).")
+    p.add_argument(
+        "--disable", action="append", default=[], metavar="URL_OR_NAME", help="Stop fetching a source (repeatable)."
+    )
+    p.add_argument(
+        "--enable", action="append", default=[], metavar="URL_OR_NAME", help="Resume a disabled source (repeatable)."
+    )
+    p.add_argument(
+        "--remove", action="append", default=[], metavar="URL_OR_NAME", help="Delete a source and its health history (repeatable)."
+    )
+    p.add_argument("--show", action="store_true", help="Print registry health after import.")
+    return p.parse_args()
+
+
+def show(registry: dict) -> None:
+    rows = sorted(
+        (x for x in registry.get("sources", {}).values() if isinstance(x, dict)),
+        key=lambda x: str(x.get("name", "")).lower(),
+    )
+    print(f"{'status':<9}{'latency':>9}{'err':>7}{'yield':>7}  name")
+    for row in rows:
+        health = row.get("health", {}) or {}
+        status = health.get("status", "new") if row.get("enabled", True) else "disabled"
+        print(
+            f"{status:<9}{float(health.get('latency_ewma', 0.0)):>8.1f}s"
+            f"{float(health.get('error_rate', 0.0)):>7.2f}{int(health.get('entries_yielded', 0)):>7}"
+            f"  {row.get('name', '')}"
+        )
+
+
+def main() -> None:
+    args = parse_args()
+    registry = load_registry()
+    if args.input:
+        entries = parse_catalog(args.input)
+        added = import_catalog(registry, entries)
+        save_registry(registry)
+        print(f"[OK] Imported {len(entries)} sources ({added} new) from {args.input}")
+    for keys, enabled in ((args.disable, False), (args.enable, True)):
+        if keys:
+            urls = set_sources_enabled(registry, keys, enabled)
+            print(f"[OK] {'Enabled' if enabled else 'Disabled'} {len(urls)} sources: {urls}")
+    if args.remove:
+        removed = remove_sources(registry, args.remove)
+        print(f"[OK] Removed {len(removed)} sources: {[x.get('url') for x in removed]}")
+        for entry in removed:
+            if entry.get("origin") == "config":
+                print(
+                    f"[WARN] {entry.get('name')} is still in config.RSS_SOURCES and will be "
+                    "re-added on the next run; delete it there."
+                )
+    if args.disable or args.enable or args.remove:
+        save_registry(registry)
+    if args.show or not (args.input or args.disable or args.enable or args.remove):
+        show(registry)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "phase1_rss"))
+
+from pipeline.analyze import heuristic_analyze  # noqa: E402
+from pipeline.local_model import model_path, train_local_model  # noqa: E402
+
+OUTPUTS_DIR = ROOT / "outputs"
+LLM_SOURCES = {"llm", "llm_cache"}
+
+
+def load_labelled_items(outputs_dir: Path) -> list[dict[str, Any]]:
+    # Items the LLM actually scored, newest digest wins for repeated ids.
+    by_id: dict[str, dict[str, Any]] = {}
+    for path in sorted(outputs_dir.glob("digest_*.json")):
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            continue
+        mode = str((payload.get("run_meta") or {}).get("analysis_mode", ""))
+        if not mode.startswith("llm"):
+            continue
+        for item in payload.get("items", []):
+            source = item.get("analysis_source")
+            if source is not None and source not in LLM_SOURCES:
+                continue
+            if item.get("id") and item.get("title"):
+                by_id[str(item["id"])] = item
+    return list(by_id.values())
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Train the local relevance/category model from LLM-labelled digests.")
+    p.add_argument("--outputs-dir", type=Path, default=OUTPUTS_DIR)
+    p.add_argument("--out", type=Path, default=model_path())
+    p.add_argument("--l2", type=float, default=0.05)
+    p.add_argument("--min-category-examples", type=int, default=3)
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    items = load_labelled_items(args.outputs_dir)
+    if not items:
+        print("[WARN] No LLM-labelled digest items found; model not written.")
+        return
+
+    baseline = heuristic_analyze(items, use_local_model=False)
+    residuals = [float(x["relevance_score"]) - b["relevance_score"] for x, b in zip(items, baseline)]
+    categories = [
+        str(x.get("category", "")).strip().lower() if x.get("is_relevant") else "" for x in items
+    ]
+    model = train_local_model(
+        items, residuals, categories, l2=args.l2, min_category_examples=args.min_category_examples
+    )
+    model.save(args.out)
+
+    fitted = [a for a, _, _ in model.score(items)]
+    before = sum(abs(r) for r in residuals) / len(items)
+    after = sum(abs(r - f) for r, f in zip(residuals, fitted)) / len(items)
+    print(
+        f"[OK] Local model written: {args.out} (examples={len(items)}, "
+        f"categories={model.classes}, relevance MAE vs LLM {before:.1f} -> {after:.1f} on training data)"
+    )
+
+
+if __name__ == "__main__":
+    main()